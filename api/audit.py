@@ -0,0 +1,370 @@
+"""
+Non-blocking audit trail for scoring decisions.
+
+Request handlers hand each scored batch to AuditSink.submit(), which only
+appends it to an in-memory buffer. A background thread drains the buffer in
+batches (by size or time) into rolling parquet files and, optionally, bulk
+inserts the same rows into Postgres. Serialisation and I/O never run on the
+request path.
+
+The buffer is bounded in rows; when it is full the backpressure policy
+decides what happens:
+  drop_newest  reject the incoming batch (default, never slows requests)
+  drop_oldest  evict the oldest buffered rows to make room
+  block        wait up to block_timeout_s for room, then drop the batch
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+AUDIT_DIR = BASE_DIR / "logs" / "audit"
+
+POLICIES = ("drop_newest", "drop_oldest", "block")
+
+AUDIT_SCHEMA = pa.schema([
+    ("scored_at", pa.timestamp("us", tz="UTC")),
+    ("endpoint", pa.string()),
+    ("model_version", pa.string()),
+    ("default_probability", pa.float64()),
+    ("risk_band", pa.string()),
+    ("recommendation", pa.string()),
+    ("missing_features", pa.list_(pa.string())),
+    ("features", pa.string()),  # raw features as sent, JSON-encoded
+])
+
+
+@dataclass
+class _Chunk:
+    scored_at: datetime
+    endpoint: str
+    features: Any  # list of dicts or a DataFrame
+    probas: np.ndarray
+    risk_bands: Sequence[str]
+    recommendations: Sequence[str]
+    missing: Sequence[List[str]]
+
+    def __len__(self) -> int:
+        return len(self.probas)
+
+    def tail(self, n: int) -> "_Chunk":
+        """Last n rows (used when drop_oldest trims a chunk)."""
+        feats = self.features.iloc[-n:] if isinstance(self.features, pd.DataFrame) else self.features[-n:]
+        return _Chunk(self.scored_at, self.endpoint, feats, self.probas[-n:],
+                      self.risk_bands[-n:], self.recommendations[-n:], self.missing[-n:])
+
+
+@dataclass
+class AuditStats:
+    submitted_rows: int = 0
+    dropped_rows: int = 0
+    written_rows: int = 0
+    db_rows: int = 0
+    files: int = 0
+    flush_errors: int = 0
+    last_error: str | None = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class AuditSink:
+    def __init__(
+        self,
+        out_dir: Path = AUDIT_DIR,
+        model_version: str = "unknown",
+        batch_rows: int = 5_000,
+        flush_interval_s: float = 2.0,
+        max_buffer_rows: int = 200_000,
+        policy: str = "drop_newest",
+        block_timeout_s: float = 0.05,
+        max_rows_per_file: int = 500_000,
+        roll_interval_s: float = 600.0,
+        db_url: str | None = None,
+        db_schema: str | None = "mart",
+        db_table: str = "scoring_audit",
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audit backpressure policy {policy!r}; use one of {POLICIES}")
+        self.out_dir = Path(out_dir)
+        self.model_version = model_version
+        self.batch_rows = batch_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer_rows = max_buffer_rows
+        self.policy = policy
+        self.block_timeout_s = block_timeout_s
+        self.max_rows_per_file = max_rows_per_file
+        self.roll_interval_s = roll_interval_s
+        self.db_url = db_url
+        self.db_schema = db_schema
+        self.db_table = db_table
+
+        self.stats = AuditStats()
+        self._buffer: deque[_Chunk] = deque()
+        self._buffered_rows = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._atexit_registered = False
+
+        self._writer: pq.ParquetWriter | None = None
+        self._file_path: Path | None = None
+        self._file_rows = 0
+        self._file_opened_at = 0.0
+        self._engine = None
+
+    # ---------- config ----------
+    @classmethod
+    def from_env(cls, model_version: str) -> "AuditSink | None":
+        """Build the sink from AUDIT_* environment variables; None when AUDIT_ENABLED=0."""
+        if os.getenv("AUDIT_ENABLED", "1").lower() in ("0", "false", "no"):
+            return None
+        return cls(
+            out_dir=Path(os.getenv("AUDIT_DIR", str(AUDIT_DIR))),
+            model_version=model_version,
+            batch_rows=int(os.getenv("AUDIT_BATCH_ROWS", "5000")),
+            flush_interval_s=float(os.getenv("AUDIT_FLUSH_INTERVAL_S", "2")),
+            max_buffer_rows=int(os.getenv("AUDIT_MAX_BUFFER_ROWS", "200000")),
+            policy=os.getenv("AUDIT_POLICY", "drop_newest"),
+            db_url=os.getenv("AUDIT_DB_URL") or None,
+        )
+
+    # ---------- producer side ----------
+    def submit(
+        self,
+        endpoint: str,
+        features,
+        probas: Sequence[float],
+        risk_bands: Sequence[str],
+        recommendations: Sequence[str],
+        missing: Sequence[List[str]],
+    ) -> bool:
+        """
+        Queue one scored batch. Never does I/O; returns False if the batch was
+        dropped by the backpressure policy.
+        """
+        chunk = _Chunk(datetime.now(timezone.utc), endpoint, features,
+                       np.asarray(probas, dtype=float), risk_bands, recommendations, missing)
+        n = len(chunk)
+        if n == 0:
+            return True
+        self._ensure_started()
+
+        with self._cond:
+            self.stats.submitted_rows += n
+            if self._closing:
+                self.stats.dropped_rows += n
+                return False
+
+            if self._buffered_rows + n > self.max_buffer_rows:
+                if self.policy == "block":
+                    self._cond.wait_for(
+                        lambda: self._buffered_rows + n <= self.max_buffer_rows,
+                        timeout=self.block_timeout_s,
+                    )
+                elif self.policy == "drop_oldest":
+                    self._evict(self._buffered_rows + n - self.max_buffer_rows)
+
+            if self._buffered_rows + n > self.max_buffer_rows:
+                self.stats.dropped_rows += n
+                return False
+
+            self._buffer.append(chunk)
+            self._buffered_rows += n
+            if self._buffered_rows >= self.batch_rows:
+                self._cond.notify_all()
+        return True
+
+    def _evict(self, rows: int) -> None:
+        while rows > 0 and self._buffer:
+            oldest = self._buffer[0]
+            if len(oldest) <= rows:
+                self._buffer.popleft()
+                self._buffered_rows -= len(oldest)
+                self.stats.dropped_rows += len(oldest)
+                rows -= len(oldest)
+            else:
+                self._buffer[0] = oldest.tail(len(oldest) - rows)
+                self._buffered_rows -= rows
+                self.stats.dropped_rows += rows
+                rows = 0
+
+    # ---------- lifecycle ----------
+    def _ensure_started(self) -> None:
+        # threads do not survive fork: a pre-forked worker starts its own writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._closing = False
+            self._writer = None
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            # once per sink: restarts (and forked children, which inherit the
+            # registration) reuse it, close() acts on the current process only
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Flush everything still buffered and close the current parquet file."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        self._thread = None
+
+    # ---------- writer thread ----------
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closing or self._buffered_rows >= self.batch_rows,
+                    timeout=self.flush_interval_s,
+                )
+                chunks = list(self._buffer)
+                self._buffer.clear()
+                self._buffered_rows = 0
+                closing = self._closing
+                self._cond.notify_all()  # wake producers blocked on a full buffer
+
+            if chunks:
+                self._flush(chunks)
+            elif self._writer is not None and time.monotonic() - self._file_opened_at >= self.roll_interval_s:
+                self._close_file()
+
+            if closing:
+                self._close_file()
+                return
+
+    def _flush(self, chunks: List[_Chunk]) -> None:
+        try:
+            table = pa.concat_tables([self._to_table(c) for c in chunks])
+        except Exception as e:
+            self._record_error(e, sum(len(c) for c in chunks))
+            return
+
+        try:
+            self._write_parquet(table)
+            with self._cond:
+                self.stats.written_rows += table.num_rows
+        except Exception as e:
+            self._record_error(e)
+
+        if self.db_url:
+            try:
+                self._write_db(table)
+                with self._cond:
+                    self.stats.db_rows += table.num_rows
+            except Exception as e:
+                self._record_error(e)
+
+    def _to_table(self, chunk: _Chunk) -> pa.Table:
+        if isinstance(chunk.features, pd.DataFrame):
+            features_json = chunk.features.to_json(orient="records", lines=True).splitlines()
+        else:
+            features_json = [json.dumps(f, default=str) for f in chunk.features]
+        n = len(chunk)
+        return pa.table({
+            "scored_at": pa.array([chunk.scored_at] * n, type=pa.timestamp("us", tz="UTC")),
+            "endpoint": pa.array([chunk.endpoint] * n, type=pa.string()),
+            "model_version": pa.array([self.model_version] * n, type=pa.string()),
+            "default_probability": pa.array(chunk.probas, type=pa.float64()),
+            "risk_band": pa.array(list(chunk.risk_bands), type=pa.string()),
+            "recommendation": pa.array(list(chunk.recommendations), type=pa.string()),
+            "missing_features": pa.array(list(chunk.missing), type=pa.list_(pa.string())),
+            "features": pa.array(features_json, type=pa.string()),
+        }, schema=AUDIT_SCHEMA)
+
+    def _write_parquet(self, table: pa.Table) -> None:
+        now = time.monotonic()
+        if self._writer is not None and (
+            self._file_rows >= self.max_rows_per_file or now - self._file_opened_at >= self.roll_interval_s
+        ):
+            self._close_file()
+
+        if self._writer is None:
+            ts = datetime.now(timezone.utc)
+            day_dir = self.out_dir / f"date={ts:%Y-%m-%d}"
+            day_dir.mkdir(parents=True, exist_ok=True)
+            self._file_path = day_dir / f"audit_{ts:%H%M%S_%f}_{os.getpid()}.parquet.tmp"
+            self._writer = pq.ParquetWriter(self._file_path, AUDIT_SCHEMA, compression="zstd")
+            self._file_rows = 0
+            self._file_opened_at = now
+
+        self._writer.write_table(table)  # one row group per flush
+        self._file_rows += table.num_rows
+
+    def _close_file(self) -> None:
+        """Finish the current file; the rename makes it visible to readers only once complete."""
+        if self._writer is None:
+            return
+        try:
+            self._writer.close()
+            self._file_path.rename(self._file_path.with_suffix(""))
+            with self._cond:
+                self.stats.files += 1
+        except Exception as e:
+            self._record_error(e)
+        finally:
+            self._writer = None
+            self._file_path = None
+
+    def _write_db(self, table: pa.Table) -> None:
+        if self._engine is None:
+            from sqlalchemy import create_engine
+
+            self._engine = create_engine(self.db_url, hide_parameters=True)
+        df = table.to_pandas()
+        df["missing_features"] = df["missing_features"].map(lambda m: ",".join(m))
+        df.to_sql(self.db_table, self._engine, schema=self.db_schema, if_exists="append",
+                  index=False, method="multi", chunksize=5000)
+
+    def _record_error(self, e: Exception, lost_rows: int = 0) -> None:
+        error = f"{type(e).__name__}: {e}"
+        with self._cond:
+            self.stats.flush_errors += 1
+            self.stats.dropped_rows += lost_rows
+            self.stats.last_error = error
+        logger.warning("audit flush failed: %s", error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        # stats are updated by request threads and the writer thread, always under _cond
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "buffered_rows": self._buffered_rows,
+                "max_buffer_rows": self.max_buffer_rows,
+                "submitted_rows": self.stats.submitted_rows,
+                "dropped_rows": self.stats.dropped_rows,
+                "written_rows": self.stats.written_rows,
+                "db_rows": self.stats.db_rows,
+                "files": self.stats.files,
+                "flush_errors": self.stats.flush_errors,
+                "last_error": self.stats.last_error,
+                "out_dir": str(self.out_dir),
+            }
@@ -0,0 +1,242 @@
+"""
+Compact, scoring-only form of the fitted pipeline (models/compact/).
+
+joblib.load unpickles the whole sklearn object graph; for scoring only a few
+arrays are needed. export_compact writes them as
+
+  model.json   versioned schema: raw columns in order, numeric fill values,
+               categories and most-frequent fill per categorical column, the
+               source model's hash, array dtypes and shapes
+  model.npz    the HistGradientBoosting trees, all trees concatenated:
+               split feature / threshold / children / missing direction per
+               node and the leaf values as float32
+
+Split thresholds and fill values stay float64: rounding them would send
+values that sit exactly on a threshold down the other branch. Leaves are
+turned into self-loops, so scoring is `max_depth` vectorised gather steps
+over a (rows x trees) array of node ids, with no per-tree Python loop. The
+imputers fill every NaN before the trees run, so a step is just
+`x <= threshold`; missing_left is kept so the artifact describes the trees
+completely. load_compact rebuilds a CompactModel from the two files without
+sklearn.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+FORMAT = "hgb-compact"
+FORMAT_VERSION = 1
+
+SCHEMA_FILE = "model.json"
+ARRAYS_FILE = "model.npz"
+
+# rows scored per traversal block; bounds the (rows x trees) node-id array
+CHUNK_ROWS = 4096
+
+
+# -------------------------
+# Export
+# -------------------------
+def _file_version(path: Path) -> str:
+    """Same short content hash api.model.model_version records for the joblib file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _column_specs(preprocess) -> List[Dict[str, Any]]:
+    """One entry per raw column in transformed-column order."""
+    specs = []
+    for name, transformer, cols in preprocess.transformers_:
+        if not isinstance(cols, (list, tuple)) or len(cols) == 0:
+            continue
+        steps = getattr(transformer, "named_steps", {})
+        if set(steps) - {"imputer", "onehot"} or "imputer" not in steps:
+            raise NotImplementedError(f"Transformer {name!r} has unsupported steps {list(steps)}")
+        imputer = steps["imputer"]
+        start = preprocess.output_indices_[name].start
+
+        if "onehot" in steps:
+            onehot = steps["onehot"]
+            if onehot.drop_idx_ is not None or getattr(onehot, "infrequent_categories_", None) is not None:
+                raise NotImplementedError("OneHotEncoder drop / infrequent categories are not supported")
+            for col, fill, cats in zip(cols, imputer.statistics_, onehot.categories_):
+                specs.append({"name": col, "kind": "categorical", "fill": str(fill),
+                              "categories": [str(c) for c in cats], "start": start})
+                start += len(cats)
+        else:
+            fills = np.asarray(imputer.statistics_, dtype=float)
+            if np.isnan(fills).any():
+                raise NotImplementedError(f"Transformer {name!r} drops all-missing columns; retrain the model")
+            for col, fill in zip(cols, fills):
+                specs.append({"name": col, "kind": "numeric", "fill": float(fill), "start": start})
+                start += 1
+    return specs
+
+
+def _tree_arrays(estimator) -> Dict[str, np.ndarray]:
+    """All trees' nodes concatenated, child ids global, leaves pointing at themselves."""
+    if not hasattr(estimator, "_predictors"):
+        raise NotImplementedError(f"Compact export supports HistGradientBoostingClassifier, "
+                                  f"not {type(estimator).__name__}")
+    if estimator.n_trees_per_iteration_ != 1 or len(estimator.classes_) != 2:
+        raise NotImplementedError("Compact export supports binary classifiers only")
+    if getattr(estimator, "_preprocessor", None) is not None:
+        raise NotImplementedError("Native categorical features are not supported")
+
+    trees = [predictors[0].nodes for predictors in estimator._predictors]
+    if any(nodes["is_categorical"].any() for nodes in trees):
+        raise NotImplementedError("Categorical splits are not supported")
+
+    offsets = np.cumsum([0] + [len(nodes) for nodes in trees])
+    nodes = np.concatenate(trees)
+    ids = np.arange(len(nodes))
+    shift = np.repeat(offsets[:-1], [len(n) for n in trees])
+    leaf = nodes["is_leaf"].astype(bool)
+
+    return {
+        "roots": offsets[:-1].astype(np.int32),
+        "feature": np.where(leaf, 0, nodes["feature_idx"]).astype(np.int32),
+        "threshold": nodes["num_threshold"].astype(np.float64),
+        "missing_left": nodes["missing_go_to_left"].astype(bool),
+        "left": np.where(leaf, ids, nodes["left"] + shift).astype(np.int32),
+        "right": np.where(leaf, ids, nodes["right"] + shift).astype(np.int32),
+        "value": np.where(leaf, nodes["value"], 0.0).astype(np.float32),
+        "max_depth": int(nodes["depth"].max()),
+    }
+
+
+def export_compact(pipeline, out_dir: Path, source: Path | None = None) -> Dict[str, Any]:
+    """
+    Write model.json + model.npz for a fitted Pipeline(preprocess, model).
+
+    Parameters
+    ----------
+    pipeline : sklearn.pipeline.Pipeline
+        ColumnTransformer of imputer (+ one-hot) branches followed by a
+        binary HistGradientBoostingClassifier, as built in notebook 05.
+    out_dir : Path
+        Artifact directory (created if needed).
+    source : Path, optional
+        The joblib file the pipeline came from; its hash is recorded so the
+        audit log shows the same model version whichever format scored.
+
+    Returns
+    -------
+    dict
+        The schema written to model.json.
+    """
+    preprocess = pipeline.named_steps["preprocess"]
+    estimator = pipeline.named_steps["model"]
+    columns = _column_specs(preprocess)
+    trees = _tree_arrays(estimator)
+    max_depth = trees.pop("max_depth")
+
+    import sklearn
+
+    schema = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "source": {"file": Path(source).name, "model_version": _file_version(source)} if source else None,
+        "columns": columns,
+        "n_features": int(estimator.n_features_in_),
+        "n_trees": len(trees["roots"]),
+        "max_depth": max_depth,
+        "baseline": float(np.ravel(estimator._baseline_prediction)[0]),
+        "classes": [c.item() if hasattr(c, "item") else c for c in estimator.classes_],
+        "arrays": {k: {"dtype": str(v.dtype), "shape": list(v.shape)} for k, v in trees.items()},
+    }
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.savez(out_dir / ARRAYS_FILE, **trees)
+    (out_dir / SCHEMA_FILE).write_text(json.dumps(schema, indent=2))
+    return schema
+
+
+# -------------------------
+# Scoring
+# -------------------------
+class CompactModel:
+    """Scoring-only predictor with the pipeline's predict_proba contract (DataFrame in, (n, 2) out)."""
+
+    def __init__(self, schema: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+        if schema.get("format") != FORMAT or schema.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact {schema.get('format')} v{schema.get('format_version')}, "
+                             f"expected {FORMAT} v{FORMAT_VERSION}")
+        self.schema = schema
+        self.features = [c["name"] for c in schema["columns"]]
+        self.model_version = (schema.get("source") or {}).get("model_version")
+        self.classes_ = np.asarray(schema["classes"])
+        self._columns = schema["columns"]
+        self._categories = {
+            c["name"]: pd.Index(c["categories"]) for c in self._columns if c["kind"] == "categorical"
+        }
+        for name in ("feature", "threshold", "missing_left", "left", "right", "value"):
+            setattr(self, f"_{name}", arrays[name])
+        # traversal layout: intp ids (no cast per gather), children interleaved so
+        # one gather at 2 * node + went_right picks the next node
+        self._roots = arrays["roots"].astype(np.intp)
+        self._split_feature = arrays["feature"].astype(np.intp)
+        self._children = np.column_stack([arrays["left"], arrays["right"]]).astype(np.intp).ravel()
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """The matrix the trees see: fills applied, categoricals one-hot encoded (unknown = all zeros)."""
+        n = len(X)
+        Xt = np.zeros((n, self.schema["n_features"]), dtype=np.float64)
+        rows = np.arange(n)
+        for col in self._columns:
+            name, start = col["name"], col["start"]
+            if col["kind"] == "numeric":
+                values = X[name].to_numpy(dtype=np.float64, na_value=np.nan)
+                Xt[:, start] = np.where(np.isnan(values), col["fill"], values)
+            else:
+                values = X[name].to_numpy(dtype=object)
+                # like SimpleImputer: NaN is missing, None is an (unknown) value
+                values = np.where(values != values, col["fill"], values)
+                codes = self._categories[name].get_indexer(values)
+                known = codes >= 0
+                Xt[rows[known], start + codes[known]] = 1.0
+        return Xt
+
+    def decision_function(self, X: pd.DataFrame) -> np.ndarray:
+        """Log-odds of the positive class."""
+        Xt = self.transform(X)
+        n_features = Xt.shape[1]
+        raw = np.empty(len(Xt), dtype=np.float64)
+        for start in range(0, len(Xt), CHUNK_ROWS):
+            block = Xt[start:start + CHUNK_ROWS].ravel()
+            row_base = np.arange(0, len(block), n_features)[:, None]
+            node = np.broadcast_to(self._roots, (len(row_base), len(self._roots)))
+            for _ in range(self.schema["max_depth"]):
+                x = block[row_base + self._split_feature[node]]
+                node = self._children[2 * node + (x > self._threshold[node])]
+            raw[start:start + len(row_base)] = self._value[node].sum(axis=1, dtype=np.float64)
+        return raw + self.schema["baseline"]
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        with np.errstate(over="ignore"):  # exp overflow -> p = 0, the correct limit
+            p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1 - p, p])
+
+
+def load_compact(path: Path) -> CompactModel:
+    """Read model.json + model.npz from an artifact directory."""
+    path = Path(path)
+    schema = json.loads((path / SCHEMA_FILE).read_text())
+    with np.load(path / ARRAYS_FILE) as npz:
+        arrays = {k: npz[k] for k in npz.files}
+    for name, spec in schema["arrays"].items():
+        if str(arrays[name].dtype) != spec["dtype"] or list(arrays[name].shape) != spec["shape"]:
+            raise ValueError(f"{path / ARRAYS_FILE}: array {name!r} does not match {SCHEMA_FILE}")
+    return CompactModel(schema, arrays)
@@ -0,0 +1,234 @@
+"""
+Input drift monitor for the features the model consumes.
+
+A reference (built once from the training parquet, see
+scripts/build_drift_reference.py) fixes the bins of every feature: quantile
+edges for numeric columns, the training categories for categorical ones, plus
+an "other" and a "missing" bin. Live traffic only increments counts in those
+same bins, so PSI and the KS approximation are computed from two count
+vectors in O(bins) without keeping or rescanning raw values.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+REFERENCE_PATH = BASE_DIR / "models" / "drift_reference.json"
+
+N_BINS = 10
+# proportions are floored so an empty bin does not make PSI infinite
+PSI_EPS = 1e-4
+PSI_MODERATE = 0.10
+PSI_SIGNIFICANT = 0.25
+
+
+# ---------- binning ----------
+def numeric_edges(values: np.ndarray, n_bins: int = N_BINS) -> np.ndarray:
+    """Interior quantile edges of the non-missing values (duplicates removed)."""
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.array([], dtype=float)
+    qs = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return np.unique(qs)
+
+
+def _as_float(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+def bin_numeric(values, edges: np.ndarray) -> np.ndarray:
+    """Counts per bin: len(edges) + 1 value bins (right-closed) followed by a missing bin."""
+    x = _as_float(values)
+    idx = np.searchsorted(edges, x, side="left")
+    idx[np.isnan(x)] = len(edges) + 1
+    return np.bincount(idx, minlength=len(edges) + 2)
+
+
+def bin_categorical(values, categories: List[str], index: Dict[str, int] | None = None) -> np.ndarray:
+    """Counts per category, followed by an "other" bin (unseen values) and a missing bin."""
+    other, missing = len(categories), len(categories) + 1
+    if isinstance(values, list):
+        # plain lookups beat building a Categorical for the few records of a request
+        index = index or {c: i for i, c in enumerate(categories)}
+        codes = np.fromiter(
+            (index.get(v, other) if isinstance(v, str) else missing if v is None or v != v else other
+             for v in values),
+            dtype=np.int64, count=len(values),
+        )
+    else:
+        values = pd.Series(values, dtype=object)
+        codes = pd.Categorical(values, categories=categories).codes.astype(np.int64)
+        codes[codes < 0] = other
+        codes[values.isna().to_numpy()] = missing
+    return np.bincount(codes, minlength=len(categories) + 2)
+
+
+# ---------- metrics ----------
+def psi(ref_counts: np.ndarray, live_counts: np.ndarray) -> float:
+    """Population Stability Index over matching bins."""
+    p = np.maximum(ref_counts / max(ref_counts.sum(), 1), PSI_EPS)
+    q = np.maximum(live_counts / max(live_counts.sum(), 1), PSI_EPS)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_approx(ref_counts: np.ndarray, live_counts: np.ndarray) -> float:
+    """
+    Kolmogorov-Smirnov statistic evaluated at the bin edges only (a lower
+    bound of the exact KS). Uses the ordered value bins; the missing bin is
+    excluded.
+    """
+    p, q = ref_counts[:-1], live_counts[:-1]
+    if p.sum() == 0 or q.sum() == 0:
+        return float("nan")
+    return float(np.max(np.abs(np.cumsum(p) / p.sum() - np.cumsum(q) / q.sum())))
+
+
+def psi_status(value: float) -> str:
+    if value >= PSI_SIGNIFICANT:
+        return "SIGNIFICANT"
+    if value >= PSI_MODERATE:
+        return "MODERATE"
+    return "STABLE"
+
+
+# ---------- reference ----------
+def build_reference(
+    df: pd.DataFrame,
+    numeric_cols: List[str],
+    categorical_cols: List[str],
+    n_bins: int = N_BINS,
+    source: str | None = None,
+) -> Dict[str, Any]:
+    """Fixed bins and training counts for every model input column."""
+    features: Dict[str, Any] = {}
+    for col in numeric_cols:
+        x = _as_float(df[col])
+        edges = numeric_edges(x, n_bins)
+        features[col] = {"kind": "numeric", "edges": edges.tolist(), "counts": bin_numeric(x, edges).tolist()}
+    for col in categorical_cols:
+        cats = sorted(df[col].dropna().astype(str).unique().tolist())
+        features[col] = {"kind": "categorical", "categories": cats,
+                         "counts": bin_categorical(df[col], cats).tolist()}
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": source,
+        "rows": int(len(df)),
+        "n_bins": n_bins,
+        "features": features,
+    }
+
+
+# ---------- live monitor ----------
+class DriftMonitor:
+    """Live histograms on the reference bins; safe to update from several threads."""
+
+    def __init__(self, reference: Dict[str, Any]) -> None:
+        self.reference = reference
+        self._features = reference["features"]
+        self._edges = {c: np.asarray(f["edges"], dtype=float)
+                       for c, f in self._features.items() if f["kind"] == "numeric"}
+        self._cat_index = {c: {v: i for i, v in enumerate(f["categories"])}
+                           for c, f in self._features.items() if f["kind"] == "categorical"}
+        self._ref_counts = {c: np.asarray(f["counts"], dtype=np.int64) for c, f in self._features.items()}
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def load(cls, path: Path = REFERENCE_PATH) -> "DriftMonitor":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.rows = 0
+            self.since = datetime.now(timezone.utc)
+            self._live = {c: np.zeros_like(v) for c, v in self._ref_counts.items()}
+
+    def _bin(self, col: str, values) -> np.ndarray:
+        f = self._features[col]
+        if f["kind"] == "numeric":
+            return bin_numeric(values, self._edges[col])
+        return bin_categorical(values, f["categories"], self._cat_index[col])
+
+    def update(self, features) -> None:
+        """Add one scored batch: a list of raw feature dicts or a DataFrame (absent = missing)."""
+        if isinstance(features, pd.DataFrame):
+            n = len(features)
+            columns = {c: features[c].to_numpy() if c in features.columns else [None] * n for c in self._features}
+        else:
+            n = len(features)
+            columns = {c: [r.get(c) for r in features] for c in self._features}
+        if n == 0:
+            return
+        # bin outside the lock; only the additions are serialised
+        counts = {c: self._bin(c, v) for c, v in columns.items()}
+        with self._lock:
+            self.rows += n
+            for c, v in counts.items():
+                self._live[c] += v
+
+    def update_from_audit(self, files: Iterable[Path]) -> int:
+        """Add the decisions recorded in audit parquet files (see api/audit.py)."""
+        import pyarrow.parquet as pq
+
+        rows = 0
+        for path in files:
+            pf = pq.ParquetFile(path)
+            for rg in range(pf.num_row_groups):
+                raw = pf.read_row_group(rg, columns=["features"]).column("features").to_pylist()
+                self.update([json.loads(r) for r in raw])
+                rows += len(raw)
+        return rows
+
+    def counts(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {c: v.copy() for c, v in self._live.items()}
+
+    def load_counts(self, counts: Dict[str, List[int]], rows: int, since: str | None = None) -> None:
+        with self._lock:
+            if since:
+                self.since = datetime.fromisoformat(since)
+            for c, v in counts.items():
+                if c in self._live and len(v) == len(self._live[c]):
+                    self._live[c] = np.asarray(v, dtype=np.int64)
+            self.rows = rows
+
+    def report(self) -> Dict[str, Any]:
+        """PSI / KS per feature from the current counts, most drifted first."""
+        live = self.counts()
+        rows = []
+        for col, ref in self._ref_counts.items():
+            cur = live[col]
+            value = psi(ref, cur) if cur.sum() else float("nan")
+            ks = ks_approx(ref, cur) if self._features[col]["kind"] == "numeric" and cur.sum() else float("nan")
+            rows.append({
+                "feature": col,
+                "kind": self._features[col]["kind"],
+                "psi": None if np.isnan(value) else round(value, 5),
+                "ks": None if np.isnan(ks) else round(ks, 5),
+                "status": None if np.isnan(value) else psi_status(value),
+                "missing_share_ref": round(float(ref[-1] / max(ref.sum(), 1)), 5),
+                "missing_share_live": round(float(cur[-1] / max(cur.sum(), 1)), 5),
+            })
+        rows.sort(key=lambda r: -1 if r["psi"] is None else r["psi"], reverse=True)
+
+        scored = [r["psi"] for r in rows if r["psi"] is not None]
+        return {
+            "computed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "window_start": self.since.isoformat(timespec="seconds"),
+            "rows": self.rows,
+            "reference_rows": self.reference["rows"],
+            "max_psi": max(scored) if scored else None,
+            "status": psi_status(max(scored)) if scored else None,
+            "features": rows,
+        }
@@ -1,8 +1,112 @@
-from fastapi import FastAPI, HTTPException
-from api.schemas import PredictRequest, PredictResponse
-from api.model import predict_proba_one
+import json
+import os
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="Home Credit Risk API", version="1.0.0")
+import numpy as np
+import pyarrow as pa
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from api.schemas import (
+    PredictBatchRequest,
+    PredictBatchResponse,
+    PredictRequest,
+    PredictResponse,
+)
+from api.audit import AuditSink
+from api.drift import REFERENCE_PATH, DriftMonitor
+from api.model import model_version, predict_proba_batch, predict_proba_frame, predict_proba_one
+from api.reasons import MAX_TOP_K, predict_reasons_batch, predict_reasons_frame
+
+# scoring audit trail (AUDIT_ENABLED=0 turns it off); see api/audit.py
+audit = AuditSink.from_env(model_version())
+
+# live input drift against the training bins; off until the reference is built
+# (scripts/build_drift_reference.py)
+_drift_reference = os.getenv("DRIFT_REFERENCE", str(REFERENCE_PATH))
+drift = DriftMonitor.load(_drift_reference) if os.path.exists(_drift_reference) else None
+_drift_report = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if audit is not None:
+        audit.start()
+    yield
+    if audit is not None:
+        # drain the buffer before the worker exits
+        await run_in_threadpool(audit.close)
+
+
+app = FastAPI(title="Home Credit Risk API", version="1.0.0", lifespan=lifespan)
+
+# records scored per predict_proba call on the streaming endpoint
+STREAM_BATCH_SIZE = 2000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# ----- policy cut-offs -----
+EXPECTED_FEATURE_COUNT = 17  # your model expects 17 raw features
+HIGH_QUALITY_MAX_MISSING = 0.20
+MEDIUM_QUALITY_MAX_MISSING = 0.50
+LOW_RISK_MAX_PROBA = 0.08
+MEDIUM_RISK_MAX_PROBA = 0.15
+RISK_BANDS = np.array(["LOW", "MEDIUM", "HIGH"], dtype=object)
+RECOMMENDATIONS = np.array(["APPROVE", "REVIEW", "REJECT"], dtype=object)
+
+
+def _record(endpoint: str, features, probas, risk_bands, recommendations, missing) -> None:
+    """
+    Hand a scored batch to the audit log and the drift monitor.
+    Can block (AUDIT_POLICY=block, drift binning of the whole batch), so it
+    must run in a worker thread, never on the event loop.
+    """
+    if audit is not None:
+        audit.submit(endpoint, features, probas, risk_bands, recommendations, missing)
+    if drift is not None:
+        drift.update(features)
+
+
+def _check_reasons(reasons: int) -> None:
+    if not 0 <= reasons <= MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"reasons must be between 0 and {MAX_TOP_K}")
+
+
+def build_response(proba: float, missing: list[str], reasons: list[dict] | None = None) -> PredictResponse:
+    pct = round(proba * 100, 2)
+
+    # ----- data quality (based on missing ratio) -----
+    missing_ratio = len(missing) / EXPECTED_FEATURE_COUNT
+
+    if missing_ratio <= HIGH_QUALITY_MAX_MISSING:
+        data_quality = "HIGH"
+    elif missing_ratio <= MEDIUM_QUALITY_MAX_MISSING:
+        data_quality = "MEDIUM"
+    else:
+        data_quality = "LOW"
+
+    # ----- risk band + recommendation (simple policy) -----
+    if proba < LOW_RISK_MAX_PROBA:
+        risk_band = "LOW"
+        recommendation = "APPROVE"
+    elif proba < MEDIUM_RISK_MAX_PROBA:
+        risk_band = "MEDIUM"
+        recommendation = "REVIEW"
+    else:
+        risk_band = "HIGH"
+        recommendation = "REJECT"
+
+    return PredictResponse(
+        default_probability=proba,
+        default_probability_pct=pct,
+        risk_band=risk_band,
+        recommendation=recommendation,
+        data_quality=data_quality,
+        missing_features=missing,
+        reason_codes=reasons,
+    )
 
 
 @app.get("/health")
@@ -10,41 +114,317 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
-    try:
-        proba, missing = predict_proba_one(req.features)
-        pct = round(proba * 100, 2)
+@app.get("/audit/stats")
+def audit_stats():
+    """Counters of this worker's audit sink (buffered, dropped, written rows)."""
+    if audit is None:
+        return {"enabled": False}
+    return {"enabled": True, "model_version": audit.model_version, **audit.snapshot()}
 
-        # ----- data quality (based on missing ratio) -----
-        expected_count = 17  # your model expects 17 raw features
-        missing_ratio = len(missing) / expected_count
 
-        if missing_ratio <= 0.20:
-            data_quality = "HIGH"
-        elif missing_ratio <= 0.50:
-            data_quality = "MEDIUM"
-        else:
-            data_quality = "LOW"
-
-        # ----- risk band + recommendation (simple policy) -----
-        if proba < 0.08:
-            risk_band = "LOW"
-            recommendation = "APPROVE"
-        elif proba < 0.15:
-            risk_band = "MEDIUM"
-            recommendation = "REVIEW"
+def _require_drift() -> DriftMonitor:
+    if drift is None:
+        raise HTTPException(status_code=404, detail="Drift reference not found; run scripts/build_drift_reference.py")
+    return drift
+
+
+@app.get("/drift")
+def drift_report():
+    """
+    Latest drift report (PSI / KS per input feature) for this worker.
+    Computed on the first call and on POST /drift/refresh.
+    """
+    global _drift_report
+    monitor = _require_drift()
+    if _drift_report is None:
+        _drift_report = monitor.report()
+    return _drift_report
+
+
+@app.post("/drift/refresh")
+def drift_refresh(reset: bool = False):
+    """Recompute the report from the live histograms; ``reset`` then starts a new window."""
+    global _drift_report
+    monitor = _require_drift()
+    _drift_report = monitor.report()
+    if reset:
+        monitor.reset()
+    return _drift_report
+
+
+@app.post("/predict", response_model=PredictResponse, response_model_exclude_none=True)
+def predict(req: PredictRequest, reasons: int = 0):
+    """Score one applicant; ``reasons=k`` adds the top-k adverse reason codes."""
+    _check_reasons(reasons)
+    try:
+        if reasons:
+            probas, missing_list, reason_list = predict_reasons_batch([req.features], reasons)
+            proba, missing = float(probas[0]), missing_list[0]
+            resp = build_response(proba, missing, reason_list[0])
         else:
-            risk_band = "HIGH"
-            recommendation = "REJECT"
-
-        return PredictResponse(
-            default_probability=proba,
-            default_probability_pct=pct,
-            risk_band=risk_band,
-            recommendation=recommendation,
-            data_quality=data_quality,
-            missing_features=missing,
-        )
+            proba, missing = predict_proba_one(req.features)
+            resp = build_response(proba, missing)
+        _record("/predict", [req.features], [proba], [resp.risk_band], [resp.recommendation], [missing])
+        return resp
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+def _risk_band_index(probas: np.ndarray) -> np.ndarray:
+    """0/1/2 for LOW/MEDIUM/HIGH, same cut-offs as build_response."""
+    return np.searchsorted([LOW_RISK_MAX_PROBA, MEDIUM_RISK_MAX_PROBA], probas, side="right")
+
+
+REASON_CODE_TYPE = pa.list_(pa.struct([("feature", pa.string()), ("contribution", pa.float64())]))
+
+
+def build_arrow_response(
+    probas: np.ndarray, missing: list[list[str]], reasons: list[list[dict]] | None = None
+) -> pa.Table:
+    """Vectorized build_response: same columns as PredictResponse, one row per applicant."""
+    n_missing = np.fromiter((len(m) for m in missing), dtype=np.int64, count=len(missing))
+    missing_ratio = n_missing / EXPECTED_FEATURE_COUNT
+    quality_idx = np.searchsorted(
+        [HIGH_QUALITY_MAX_MISSING, MEDIUM_QUALITY_MAX_MISSING], missing_ratio, side="left"
+    )
+    band_idx = _risk_band_index(probas)
+
+    def categorical(idx, labels):
+        return pa.DictionaryArray.from_arrays(pa.array(idx.astype(np.int8)), pa.array(labels))
+
+    columns = {
+        "default_probability": pa.array(probas, type=pa.float64()),
+        "default_probability_pct": pa.array(np.round(probas * 100, 2), type=pa.float64()),
+        "risk_band": categorical(band_idx, list(RISK_BANDS)),
+        "recommendation": categorical(band_idx, list(RECOMMENDATIONS)),
+        "data_quality": categorical(quality_idx, ["HIGH", "MEDIUM", "LOW"]),
+        "missing_features": pa.array(missing, type=pa.list_(pa.string())),
+    }
+    if reasons is not None:
+        columns["reason_codes"] = pa.array(reasons, type=REASON_CODE_TYPE)
+    return pa.table(columns)
+
+
+def _arrow_to_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _score_arrow_body(body: bytes, reasons: int = 0):
+    """
+    Decode an Arrow IPC stream and score it. A column is either present or
+    absent for the whole batch, so every row shares the same missing list.
+    """
+    table = pa.ipc.open_stream(body).read_all()
+    # numeric columns convert without copies where possible; the table is released as it converts
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    if reasons:
+        probas, missing, reason_list = predict_reasons_frame(df, reasons)
+    else:
+        (probas, missing), reason_list = predict_proba_frame(df), None
+    return df, probas, [missing] * len(probas), reason_list
+
+
+def _score_json_body(body: bytes, reasons: int = 0):
+    req = PredictBatchRequest.model_validate_json(body)
+    features = [r.features for r in req.records]
+    if reasons:
+        return features, *predict_reasons_batch(features, reasons)
+    return features, *predict_proba_batch(features), None
+
+
+def _score_batch_body(body: bytes, reasons: int, body_is_arrow: bool):
+    """Decode, score and record one /predict/batch body; runs in the threadpool."""
+    score = _score_arrow_body if body_is_arrow else _score_json_body
+    features, probas, missing, reason_list = score(body, reasons)
+    band_idx = _risk_band_index(probas)
+    _record("/predict/batch", features, probas, RISK_BANDS[band_idx], RECOMMENDATIONS[band_idx], missing)
+    return probas, missing, reason_list
+
+
+def _wants_arrow(request: Request, body_is_arrow: bool) -> bool:
+    accept = request.headers.get("accept", "")
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        return True
+    if "application/json" in accept:
+        return False
+    return body_is_arrow
+
+
+@app.post(
+    "/predict/batch",
+    response_model=PredictBatchResponse,
+    response_model_exclude_none=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/PredictBatchRequest"}
+                },
+                ARROW_STREAM_MEDIA_TYPE: {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+        }
+    },
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+)
+async def predict_batch(request: Request, reasons: int = 0):
+    """
+    Score many applicants in one call.
+    JSON bodies follow PredictBatchRequest. Arrow IPC stream bodies
+    (``application/vnd.apache.arrow.stream``) carry one column per raw feature
+    and skip per-record JSON parsing and validation. The response is Arrow
+    when the request was Arrow or ``Accept`` asks for it, JSON otherwise.
+    ``reasons=k`` adds the top-k adverse reason codes per applicant.
+    """
+    _check_reasons(reasons)
+    body = await request.body()
+    body_is_arrow = request.headers.get("content-type", "").startswith(ARROW_STREAM_MEDIA_TYPE)
+
+    try:
+        probas, missing, reason_list = await run_in_threadpool(_score_batch_body, body, reasons, body_is_arrow)
+
+        if _wants_arrow(request, body_is_arrow):
+            table = build_arrow_response(probas, missing, reason_list)
+            return Response(_arrow_to_bytes(table), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+        reason_list = reason_list or [None] * len(probas)
+        results = [build_response(float(p), m, r) for p, m, r in zip(probas, missing, reason_list)]
+        return PredictBatchResponse(results=results)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ---------- NDJSON streaming ----------
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that does not listen for disconnects on ``receive``.
+    The body generator reads the request stream itself, and a second reader
+    would swallow request chunks. A client that goes away surfaces as
+    ClientDisconnect from ``request.stream()`` instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_ndjson_lines(request: Request):
+    """
+    Yield (line_no, line) for the non-empty lines of the request body as they
+    arrive; line_no is the 1-based physical line, blank lines included.
+    """
+    tail = b""
+    line_no = 0
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    if tail.strip():
+        yield line_no + 1, tail
+
+
+def _score_records(records: list, reasons: int = 0) -> list:
+    """
+    (proba, missing, reasons) per record, scored in one call. When that call
+    fails the records are split in halves and rescored, so a bad value only
+    costs its own record: it comes back as the Exception in its slot.
+    """
+    try:
+        if reasons:
+            probas, missing, reason_list = predict_reasons_batch(records, reasons)
+        else:
+            (probas, missing), reason_list = predict_proba_batch(records), [None] * len(records)
+        return list(zip(probas, missing, reason_list))
+    except Exception as e:
+        if len(records) == 1:
+            return [e]
+        mid = len(records) // 2
+        return _score_records(records[:mid], reasons) + _score_records(records[mid:], reasons)
+
+
+def _score_ndjson_batch(lines: list[tuple[int, bytes]], reasons: int = 0) -> bytes:
+    """
+    Parse and score one batch of (line_no, line) NDJSON records.
+    Output keeps input order; bad records get an error line instead of
+    failing the whole stream.
+    """
+    out: list[str | None] = [None] * len(lines)
+    records = []
+    positions = []
+
+    for i, (line_no, line) in enumerate(lines):
+        try:
+            obj = json.loads(line)
+            features = obj["features"]
+            if not isinstance(features, dict):
+                raise ValueError("'features' must be a JSON object")
+        except Exception as e:
+            out[i] = json.dumps({"line": line_no, "error": f"invalid record: {e}"})
+            continue
+        records.append(features)
+        positions.append(i)
+
+    ok_records, probas, bands, recommendations, missing = [], [], [], [], []
+    for i, features, result in zip(positions, records, _score_records(records, reasons) if records else []):
+        line_no = lines[i][0]
+        if isinstance(result, Exception):
+            out[i] = json.dumps({"line": line_no, "error": str(result)})
+            continue
+        p, m, r = result
+        res = build_response(float(p), m, r).model_dump(exclude_none=True)
+        out[i] = json.dumps({"line": line_no, **res})
+        ok_records.append(features)
+        probas.append(p)
+        bands.append(res["risk_band"])
+        recommendations.append(res["recommendation"])
+        missing.append(m)
+    if ok_records:
+        _record("/predict/stream", ok_records, np.asarray(probas, dtype=float), bands, recommendations, missing)
+
+    return ("\n".join(out) + "\n").encode()
+
+
+async def _score_ndjson_stream(request: Request, batch_size: int, reasons: int):
+    batch: list[tuple[int, bytes]] = []
+    async for item in _iter_ndjson_lines(request):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield await run_in_threadpool(_score_ndjson_batch, batch, reasons)
+            batch = []
+    if batch:
+        yield await run_in_threadpool(_score_ndjson_batch, batch, reasons)
+
+
+@app.post(
+    "/predict/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def predict_stream(request: Request, batch_size: int = STREAM_BATCH_SIZE, reasons: int = 0):
+    """
+    Score an NDJSON upload of {"features": {...}} records (one per line).
+    Records are scored in batches of ``batch_size`` while the upload is still
+    arriving, and one result line per record is streamed back in input order.
+    ``reasons=k`` adds the top-k adverse reason codes to every result line.
+    """
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be >= 1")
+    _check_reasons(reasons)
+    return _DuplexStreamingResponse(
+        _score_ndjson_stream(request, batch_size, reasons),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
@@ -1,13 +1,23 @@
+import hashlib
+import os
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import joblib
+import numpy as np
 import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 MODEL_PATH = BASE_DIR / "models" / "model.joblib"
+COMPACT_DIR = BASE_DIR / "models" / "compact"
+
+# "compact" scores with the exported arrays (api/compact.py, scripts/export_compact_model.py)
+# instead of unpickling the pipeline; reason codes still use the pipeline
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "joblib")
 
 _model = None
+_scorer = None
+_model_version = None
 
 
 def get_model():
@@ -19,6 +29,54 @@ def get_model():
     return _model
 
 
+def _file_version(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def get_scorer():
+    """
+    What the predict_proba_* helpers call: the pipeline, or its compact export.
+
+    A compact artifact exported from another model.joblib than the one on
+    disk is refused: /predict and the reason codes (which always use the
+    pipeline) would score with different models, and the audit log would
+    record the wrong version.
+    """
+    global _scorer
+    if _scorer is None:
+        if MODEL_FORMAT == "compact":
+            from api.compact import load_compact
+
+            compact = load_compact(COMPACT_DIR)
+            if MODEL_PATH.exists() and compact.model_version != _file_version(MODEL_PATH):
+                raise RuntimeError(
+                    f"{COMPACT_DIR} was exported from model version {compact.model_version}, but "
+                    f"{MODEL_PATH.name} is {_file_version(MODEL_PATH)}; "
+                    f"re-run scripts/export_compact_model.py"
+                )
+            _scorer = compact
+        elif MODEL_FORMAT == "joblib":
+            _scorer = get_model()
+        else:
+            raise ValueError(f"MODEL_FORMAT must be 'joblib' or 'compact', got {MODEL_FORMAT!r}")
+    return _scorer
+
+
+def model_version() -> str:
+    """Short content hash of the model file, recorded with every audited decision."""
+    global _model_version
+    if _model_version is None and MODEL_FORMAT == "compact":
+        # hash of the joblib file the artifact was exported from
+        _model_version = get_scorer().model_version
+    if _model_version is None:
+        _model_version = _file_version(MODEL_PATH)
+    return _model_version
+
+
 def _expected_raw_features(model) -> list[str]:
     """
     Get the expected raw feature names from the ColumnTransformer inside the pipeline.
@@ -44,9 +102,27 @@ def _expected_raw_features(model) -> list[str]:
     return ordered
 
 
+def expected_features() -> list[str]:
+    """Raw feature names in model order, without loading the pipeline when scoring compact."""
+    if MODEL_FORMAT == "compact":
+        return get_scorer().features
+    return _expected_raw_features(get_model())
+
+
+def _fill_value(col: str):
+    """Default used for an expected feature the caller did not send."""
+    col_lower = col.lower()
+
+    if col_lower.startswith("name_") or col_lower.endswith("_type"):
+        return "Unknown"
+    elif col_lower.startswith(("flag_", "is_")):
+        return 0
+    else:
+        return 0
+
+
 def align_features(features: Dict[str, Any]):
-    model = get_model()
-    expected = _expected_raw_features(model)
+    expected = expected_features()
 
     filled = dict(features)
     missing = []
@@ -56,21 +132,120 @@ def align_features(features: Dict[str, Any]):
             continue
 
         missing.append(col)
-        col_lower = col.lower()
-
-        if col_lower.startswith("name_") or col_lower.endswith("_type"):
-            filled[col] = "Unknown"
-        elif col_lower.startswith(("flag_", "is_")):
-            filled[col] = 0
-        else:
-            filled[col] = 0
+        filled[col] = _fill_value(col)
 
     return filled, missing
 
 
+def align_features_batch(records: List[Dict[str, Any]]):
+    """
+    Vectorized version of align_features for many applicants at once.
+    Returns one DataFrame with the expected columns (in model order) and,
+    per record, the list of features that were auto-filled.
+    """
+    expected = expected_features()
+
+    X = pd.DataFrame.from_records(records, columns=expected)
+
+    # absent[i, j] is True when record i did not send expected[j]
+    absent = np.array(
+        [[col not in rec for col in expected] for rec in records], dtype=bool
+    ).reshape(len(records), len(expected))
+
+    for j, col in enumerate(expected):
+        if absent[:, j].any():
+            X[col] = X[col].mask(absent[:, j], _fill_value(col))
+
+    missing = [[expected[j] for j in np.flatnonzero(row)] for row in absent]
+    return X, missing
+
+
+def align_features_frame(df: pd.DataFrame):
+    """
+    Column-wise alignment for tabular input (e.g. decoded Arrow batches).
+    A column is either present for every row or missing for every row, so
+    filling is one constant per absent column and no per-row work is done.
+    """
+    expected = expected_features()
+
+    missing = [col for col in expected if col not in df.columns]
+    X = df.reindex(columns=expected)
+    for col in missing:
+        X[col] = _fill_value(col)
+    return X, missing
+
+
 def predict_proba_one(features: Dict[str, Any]):
-    model = get_model()
+    model = get_scorer()
     features_filled, missing = align_features(features)
     X = pd.DataFrame([features_filled])
     proba = float(model.predict_proba(X)[:, 1][0])
     return proba, missing
+
+
+def predict_proba_batch(records: List[Dict[str, Any]]):
+    """Score many applicants with a single predict_proba call."""
+    if not records:
+        return np.empty(0, dtype=float), []
+    model = get_scorer()
+    X, missing = align_features_batch(records)
+    proba = model.predict_proba(X)[:, 1].astype(float)
+    return proba, missing
+
+
+def predict_proba_frame(df: pd.DataFrame):
+    """Score a DataFrame of raw features; missing columns apply to every row."""
+    model = get_scorer()
+    X, missing = align_features_frame(df)
+    if len(X) == 0:
+        return np.empty(0, dtype=float), missing
+    proba = model.predict_proba(X)[:, 1].astype(float)
+    return proba, missing
+
+
+def feature_schema() -> Dict[str, Any]:
+    """
+    Raw input schema learned by the fitted pipeline: numeric columns with
+    their training medians, categorical columns with their known categories.
+    """
+    schema: Dict[str, Any] = {"numeric": {}, "categorical": {}}
+    if MODEL_FORMAT == "compact":
+        for col in get_scorer().schema["columns"]:
+            if col["kind"] == "numeric":
+                schema["numeric"][col["name"]] = col["fill"]
+            else:
+                schema["categorical"][col["name"]] = col["categories"]
+        return schema
+
+    preprocess = get_model().named_steps["preprocess"]
+
+    for _, transformer, cols in preprocess.transformers_:
+        if not isinstance(cols, (list, tuple)) or len(cols) == 0:
+            continue
+        steps = getattr(transformer, "named_steps", {})
+        if "onehot" in steps:
+            for col, cats in zip(cols, steps["onehot"].categories_):
+                schema["categorical"][col] = [str(c) for c in cats]
+        elif "imputer" in steps:
+            for col, med in zip(cols, steps["imputer"].statistics_):
+                schema["numeric"][col] = float(med)
+    return schema
+
+
+def sample_features(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic applicants drawn around the training medians (for load tests and benchmarks)."""
+    rng = np.random.default_rng(seed)
+    schema = feature_schema()
+    cols: Dict[str, Any] = {}
+
+    for col, med in schema["numeric"].items():
+        if col.startswith("ext_source_"):
+            cols[col] = rng.uniform(0, 1, n)
+        elif col.startswith(("is_", "flag_")):
+            cols[col] = rng.integers(0, 2, n)
+        else:
+            cols[col] = (abs(med) or 1.0) * rng.lognormal(0, 0.25, n)
+    for col, cats in schema["categorical"].items():
+        cols[col] = rng.choice(cats, n)
+
+    return pd.DataFrame(cols).to_dict(orient="records")
@@ -0,0 +1,216 @@
+"""
+Reason codes: which raw features pushed an applicant's score up.
+
+Contributions are in log-odds, relative to a reference applicant whose
+features all sit at their imputation defaults (training median /
+most frequent category), i.e. what the pipeline assumes when nothing is
+known.
+
+  linear final estimator   exact: coef * (x - ref) summed per raw feature,
+                           so contributions add up to f(x) - f(ref)
+  tree ensembles (HGB, ..)  lookup approximation: for every raw feature a
+                           table of f(ref with that feature changed) - f(ref)
+                           over the model's own split points, built once at
+                           load time; interactions between features are ignored
+
+Both work on the transformed matrix the final estimator sees, so a request
+costs a few array lookups on top of scoring.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from api.model import _expected_raw_features, align_features_batch, align_features_frame, get_model
+
+DEFAULT_TOP_K = 3
+MAX_TOP_K = 10
+
+_explainer = None
+
+
+@dataclass
+class _FeatureTable:
+    """Lookup table of one raw feature over the transformed columns it feeds."""
+    columns: np.ndarray  # transformed column indices
+    kind: str  # "numeric" (one column, split thresholds) or "onehot" (state = active column)
+    thresholds: np.ndarray | None
+    contributions: np.ndarray  # one entry per threshold bin / category (+ unknown)
+
+
+def _raw_score(estimator, Xt: np.ndarray) -> np.ndarray:
+    """Log-odds of the positive class."""
+    if hasattr(estimator, "decision_function"):
+        return np.asarray(estimator.decision_function(Xt), dtype=float).reshape(-1)
+    p = np.clip(estimator.predict_proba(Xt)[:, 1], 1e-12, 1 - 1e-12)
+    return np.log(p / (1 - p))
+
+
+def _split_thresholds(estimator, n_columns: int) -> List[np.ndarray]:
+    """
+    Sorted unique split thresholds per transformed column, collected from the
+    fitted trees. Between two consecutive thresholds every tree takes the
+    same path, so one point per interval covers the feature exactly.
+    """
+    found: List[List[np.ndarray]] = [[] for _ in range(n_columns)]
+
+    if hasattr(estimator, "_predictors"):  # HistGradientBoosting*
+        for predictors in estimator._predictors:
+            for predictor in predictors:
+                nodes = predictor.nodes
+                split = ~nodes["is_leaf"].astype(bool)
+                for j in np.unique(nodes["feature_idx"][split]):
+                    found[j].append(nodes["num_threshold"][split & (nodes["feature_idx"] == j)])
+    elif hasattr(estimator, "estimators_"):  # forests, GradientBoosting*
+        for tree in np.ravel(estimator.estimators_):
+            t = tree.tree_
+            split = t.feature >= 0
+            for j in np.unique(t.feature[split]):
+                found[j].append(t.threshold[split & (t.feature == j)])
+    else:
+        raise NotImplementedError(f"Reason codes are not supported for {type(estimator).__name__}")
+
+    return [np.unique(np.concatenate(f)) if f else np.empty(0) for f in found]
+
+
+class ReasonCodeExplainer:
+    def __init__(self, pipeline) -> None:
+        self.preprocess = pipeline.named_steps["preprocess"]
+        self.estimator = pipeline.named_steps["model"]
+        self.features = _expected_raw_features(pipeline)
+        self._groups, numeric = self._column_groups()
+
+        # reference applicant: every feature missing, so the imputers fill their defaults
+        blank = pd.DataFrame({
+            c: pd.Series([np.nan], dtype=float if c in numeric else object) for c in self.features
+        })
+        self.reference = self._dense(self.preprocess.transform(blank))[0]
+        self.reference_score = float(_raw_score(self.estimator, self.reference[None, :])[0])
+
+        coef = getattr(self.estimator, "coef_", None)
+        if coef is not None and np.ndim(coef) == 2 and coef.shape[0] == 1:
+            self.method = "linear"
+            self._coef = coef[0].astype(float)
+            # transformed column -> raw feature
+            self._group_matrix = np.zeros((len(self.reference), len(self.features)))
+            for k, cols in enumerate(self._groups):
+                self._group_matrix[cols, k] = 1.0
+        else:
+            self.method = "lookup"
+            self._tables = self._build_tables(numeric)
+
+    @staticmethod
+    def _dense(Xt) -> np.ndarray:
+        return np.asarray(Xt.toarray() if sparse.issparse(Xt) else Xt, dtype=float)
+
+    def _column_groups(self):
+        """Transformed column indices per raw feature, and the set of numeric raw features."""
+        groups: Dict[str, np.ndarray] = {}
+        numeric = set()
+        for name, transformer, cols in self.preprocess.transformers_:
+            if not isinstance(cols, (list, tuple)) or len(cols) == 0:
+                continue
+            start = self.preprocess.output_indices_[name].start
+            steps = getattr(transformer, "named_steps", {})
+            if "onehot" in steps:
+                for col, cats in zip(cols, steps["onehot"].categories_):
+                    groups[col] = np.arange(start, start + len(cats))
+                    start += len(cats)
+            else:
+                for col in cols:
+                    groups[col] = np.array([start])
+                    numeric.add(col)
+                    start += 1
+        return [groups[c] for c in self.features], numeric
+
+    def _build_tables(self, numeric) -> List[_FeatureTable]:
+        thresholds = _split_thresholds(self.estimator, len(self.reference))
+        specs, grids = [], []
+        for col, cols in zip(self.features, self._groups):
+            if col in numeric:
+                t = thresholds[cols[0]]
+                # x <= t[i] falls in bin i; the last bin is above every threshold
+                points = np.append(t, t[-1] + 1.0) if len(t) else np.array([self.reference[cols[0]]])
+                grid = np.repeat(self.reference[None, :], len(points), axis=0)
+                grid[:, cols[0]] = points
+                specs.append((cols, "numeric", t))
+            else:
+                # one row per category, plus an all-zero row for unknown categories
+                grid = np.repeat(self.reference[None, :], len(cols) + 1, axis=0)
+                grid[:, cols] = np.vstack([np.eye(len(cols)), np.zeros(len(cols))])
+                specs.append((cols, "onehot", None))
+            grids.append(grid)
+
+        # one scoring call for every table
+        scores = _raw_score(self.estimator, np.vstack(grids)) - self.reference_score
+        tables, offset = [], 0
+        for (cols, kind, t), grid in zip(specs, grids):
+            tables.append(_FeatureTable(cols, kind, t, scores[offset:offset + len(grid)]))
+            offset += len(grid)
+        return tables
+
+    def contributions(self, Xt) -> np.ndarray:
+        """(n_rows, n_raw_features) log-odds contributions for transformed rows."""
+        Xt = self._dense(Xt)
+        if self.method == "linear":
+            return ((Xt - self.reference) * self._coef) @ self._group_matrix
+
+        out = np.empty((Xt.shape[0], len(self.features)))
+        for k, table in enumerate(self._tables):
+            if table.kind == "numeric":
+                idx = np.searchsorted(table.thresholds, Xt[:, table.columns[0]], side="left")
+            else:
+                block = Xt[:, table.columns]
+                idx = np.where(block.max(axis=1) > 0, block.argmax(axis=1), len(table.columns))
+            out[:, k] = table.contributions[idx]
+        return out
+
+    def top_adverse(self, Xt, top_k: int = DEFAULT_TOP_K) -> List[List[Dict[str, Any]]]:
+        """Per row, the top_k features that raise the default risk the most (contribution > 0)."""
+        contrib = self.contributions(Xt)
+        order = np.argsort(-contrib, axis=1, kind="stable")[:, :top_k]
+        picked = np.take_along_axis(contrib, order, axis=1)
+        return [
+            [
+                {"feature": self.features[j], "contribution": round(float(c), 4)}
+                for j, c in zip(row_idx, row_c) if c > 0
+            ]
+            for row_idx, row_c in zip(order, picked)
+        ]
+
+
+def get_explainer() -> ReasonCodeExplainer:
+    global _explainer
+    if _explainer is None:
+        _explainer = ReasonCodeExplainer(get_model())
+    return _explainer
+
+
+def _score_with_reasons(X: pd.DataFrame, top_k: int):
+    """Same result as pipeline.predict_proba, keeping the transformed matrix for the reasons."""
+    model = get_model()
+    Xt = model.named_steps["preprocess"].transform(X)
+    proba = model.named_steps["model"].predict_proba(Xt)[:, 1].astype(float)
+    return proba, get_explainer().top_adverse(Xt, top_k)
+
+
+def predict_reasons_batch(records: List[Dict[str, Any]], top_k: int = DEFAULT_TOP_K):
+    """predict_proba_batch plus the top_k adverse reason codes per record."""
+    if not records:
+        return np.empty(0, dtype=float), [], []
+    X, missing = align_features_batch(records)
+    proba, reasons = _score_with_reasons(X, top_k)
+    return proba, missing, reasons
+
+
+def predict_reasons_frame(df: pd.DataFrame, top_k: int = DEFAULT_TOP_K):
+    """predict_proba_frame plus the top_k adverse reason codes per row."""
+    X, missing = align_features_frame(df)
+    if len(X) == 0:
+        return np.empty(0, dtype=float), missing, []
+    proba, reasons = _score_with_reasons(X, top_k)
+    return proba, missing, reasons
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 class PredictRequest(BaseModel):
@@ -9,10 +9,27 @@ class PredictRequest(BaseModel):
     )
 
 
+class ReasonCode(BaseModel):
+    feature: str
+    contribution: float = Field(..., description="Increase in default log-odds vs. the reference applicant.")
+
+
 class PredictResponse(BaseModel):
     default_probability: float
     default_probability_pct: float
     risk_band: str                 
     recommendation: str            
     data_quality: str  
-    missing_features: List[str]
\ No newline at end of file
+    missing_features: List[str]
+    reason_codes: Optional[List[ReasonCode]] = None
+
+
+class PredictBatchRequest(BaseModel):
+    records: List[PredictRequest] = Field(
+        ...,
+        description="Applicants to score in one call. Each item has the same shape as a /predict body."
+    )
+
+
+class PredictBatchResponse(BaseModel):
+    results: List[PredictResponse]
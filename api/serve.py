@@ -0,0 +1,226 @@
+"""
+Pre-fork multi-worker server for the scoring API.
+
+The parent process loads and warms the model once, freezes the garbage
+collector, binds the listening socket and then forks N uvicorn workers.
+Workers inherit the model pages copy-on-write instead of each running
+joblib.load, so startup is paid once and the model is held once in RAM.
+
+A worker that exits is restarted after a delay that doubles with each
+recent failure; after MAX_CRASHES failures within CRASH_WINDOW_S the server
+stops instead of fork-looping on a worker that cannot start.
+
+Usage:
+    python -m api.serve --workers 4 --port 8000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+import warnings
+from collections import deque
+
+import uvicorn
+from threadpoolctl import threadpool_limits
+
+from api.main import app
+from api.model import MODEL_FORMAT, get_scorer, predict_proba_batch, sample_features
+from api.reasons import get_explainer
+
+WARMUP_ROWS = 256
+
+RESTART_DELAY_S = 0.5  # first restart delay, doubled for every failure in the window
+MAX_RESTART_DELAY_S = 10.0
+CRASH_WINDOW_S = 60.0
+MAX_CRASHES = 5
+
+
+# ---------- MEMORY REPORT ----------
+def process_memory(pid: int) -> dict:
+    """
+    RSS / PSS / USS in MB from /proc/<pid>/smaps_rollup (Linux only).
+    USS (private pages) is what a worker costs on top of the shared model.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])  # kB
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def print_memory_report(parent_pid: int, worker_pids: list[int]) -> None:
+    rows = [("parent", parent_pid)] + [(f"worker {i}", pid) for i, pid in enumerate(worker_pids)]
+    print(f"{'process':<10}{'pid':>8}{'rss_mb':>10}{'pss_mb':>10}{'uss_mb':>10}", flush=True)
+    for name, pid in rows:
+        try:
+            mem = process_memory(pid)
+        except OSError:
+            continue
+        print(f"{name:<10}{pid:>8}{mem['rss_mb']:>10}{mem['pss_mb']:>10}{mem['uss_mb']:>10}", flush=True)
+
+
+# ---------- PARENT ----------
+def load_and_warm() -> None:
+    """
+    Load the model and run one batch through it so lazily-initialised state
+    (imports, estimator caches) lives in the parent before forking.
+    OpenMP is held to one thread here: its thread pool does not survive fork.
+    With MODEL_FORMAT=compact the pipeline is not unpickled here; reason
+    codes load it in a worker on first use.
+    """
+    with threadpool_limits(limits=1):
+        get_scorer()
+        if MODEL_FORMAT != "compact":
+            get_explainer()  # reason-code tables are built once and shared too
+        predict_proba_batch(sample_features(WARMUP_ROWS))
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# ---------- WORKER ----------
+def run_worker(sock: socket.socket, threads: int, log_level: str) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+
+    threadpool_limits(limits=threads)
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(sock: socket.socket, threads: int, log_level: str) -> int:
+    # the only other thread at this point is pyarrow's native allocator
+    # thread (started when pandas imports it), which is fork-safe
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="This process .* is multi-threaded", category=DeprecationWarning)
+        pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, threads, log_level)
+        except SystemExit as exc:  # uvicorn logs its own startup failures before exiting
+            code = exc.code if isinstance(exc.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            # os._exit skips interpreter shutdown, so flush what the worker printed
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="OpenMP threads per worker (default: cpu_count // workers, at least 1)")
+    parser.add_argument("--memory-report-every", type=float, default=0,
+                        help="seconds between memory reports (0 = once after startup)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # no collections between load and fork: a GC pass writes to every tracked
+    # object's header and would un-share those pages in the children
+    gc.disable()
+    start = time.perf_counter()
+    load_and_warm()
+    # move everything loaded so far into the permanent generation so the
+    # workers' collectors never scan (and so never touch) the model objects
+    gc.freeze()
+    print(f"✅ model loaded and warmed in {time.perf_counter() - start:.2f}s (pid {os.getpid()})", flush=True)
+
+    sock = bind_socket(args.host, args.port)
+    workers = [spawn(sock, threads, args.log_level) for _ in range(args.workers)]
+    gc.enable()
+    print(f"🚀 {args.workers} workers on http://{args.host}:{args.port} "
+          f"({threads} thread(s) each): {workers}", flush=True)
+
+    stopping = False
+    exit_code = 0
+    crashes: deque[float] = deque()  # monotonic times of recent worker exits
+    restart_at: dict[int, float] = {}  # worker slot -> when to respawn it
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        restart_at.clear()
+        for pid in workers:
+            if pid is None:
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    next_report = time.monotonic() + 3
+    while any(pid is not None for pid in workers) or restart_at:
+        now = time.monotonic()
+        for slot, due in list(restart_at.items()):
+            if due <= now:
+                del restart_at[slot]
+                workers[slot] = spawn(sock, threads, args.log_level)
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:  # every slot is waiting for its restart
+            pid = 0
+        if pid:
+            slot = workers.index(pid)
+            workers[slot] = None
+            if stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            crashes.append(now)
+            while now - crashes[0] > CRASH_WINDOW_S:
+                crashes.popleft()
+            if len(crashes) >= MAX_CRASHES:
+                print(f"❌ {len(crashes)} worker exits within {CRASH_WINDOW_S:.0f}s (last: pid {pid}, "
+                      f"code {code}); stopping", flush=True)
+                exit_code = 1
+                stop(None, None)
+                continue
+            delay = min(RESTART_DELAY_S * 2 ** (len(crashes) - 1), MAX_RESTART_DELAY_S)
+            print(f"⚠️ worker {pid} exited with code {code}, restarting in {delay:.1f}s", flush=True)
+            restart_at[slot] = now + delay
+            continue
+
+        if next_report is not None and now >= next_report and not stopping:
+            print_memory_report(os.getpid(), [pid for pid in workers if pid is not None])
+            next_report = now + args.memory_report_every if args.memory_report_every else None
+        time.sleep(0.2)
+
+    sock.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
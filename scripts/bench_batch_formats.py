@@ -0,0 +1,90 @@
+"""
+Benchmark /predict/batch request formats: JSON vs Arrow IPC stream.
+
+Runs the API in-process (no server needed), sends the same synthetic
+applicants in both formats and reports per-call latency and rows/s, next to
+the time spent in predict_proba alone so the transport overhead is visible.
+
+Usage:
+    python scripts/bench_batch_formats.py --rows 10000 --repeat 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from api.main import ARROW_STREAM_MEDIA_TYPE, app  # noqa: E402
+from api.model import get_model, predict_proba_frame, sample_features  # noqa: E402
+
+
+def _arrow_body(records: list[dict]) -> bytes:
+    table = pa.Table.from_pylist(records)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _time_calls(fn, repeat: int) -> list[float]:
+    fn()  # warm-up
+    out = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - start)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    get_model()
+    records = sample_features(args.rows, seed=42)
+    client = TestClient(app)
+
+    # client-side encoding is part of the cost of each format
+    def call_json():
+        body = json.dumps({"records": [{"features": r} for r in records]})
+        resp = client.post("/predict/batch", content=body, headers={"Content-Type": "application/json"})
+        resp.raise_for_status()
+        resp.json()
+
+    def call_arrow():
+        body = _arrow_body(records)
+        resp = client.post("/predict/batch", content=body, headers={"Content-Type": ARROW_STREAM_MEDIA_TYPE})
+        resp.raise_for_status()
+        pa.ipc.open_stream(resp.content).read_all()
+
+    frame = pd.DataFrame.from_records(records)
+
+    results = {
+        "model_only": _time_calls(lambda: predict_proba_frame(frame), args.repeat),
+        "json": _time_calls(call_json, args.repeat),
+        "arrow": _time_calls(call_arrow, args.repeat),
+    }
+
+    print(f"rows per call: {args.rows}, calls: {args.repeat}")
+    print(f"{'path':<12}{'median ms':>12}{'rows/s':>12}")
+    for name, times in results.items():
+        med = statistics.median(times)
+        print(f"{name:<12}{med * 1000:>12.1f}{args.rows / med:>12.0f}")
+
+    speedup = statistics.median(results["json"]) / statistics.median(results["arrow"])
+    print(f"arrow vs json: {speedup:.1f}x faster per call")
+
+
+if __name__ == "__main__":
+    main()
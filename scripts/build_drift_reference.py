@@ -0,0 +1,50 @@
+"""
+Build the drift reference (fixed bins + training histograms) for the API.
+
+Bins every model input column of the training feature parquet once and
+saves them to models/drift_reference.json, next to the model they describe.
+
+Usage:
+    python scripts/build_drift_reference.py --bins 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from api.drift import N_BINS, REFERENCE_PATH, build_reference  # noqa: E402
+from api.model import feature_schema  # noqa: E402
+
+# ---------- CONFIG ----------
+TRAIN_FEATURES = BASE_DIR / "data" / "processed" / "application_train_features.parquet"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", type=Path, default=TRAIN_FEATURES)
+    parser.add_argument("--bins", type=int, default=N_BINS)
+    parser.add_argument("--out", type=Path, default=REFERENCE_PATH)
+    args = parser.parse_args()
+
+    schema = feature_schema()
+    numeric_cols = list(schema["numeric"])
+    categorical_cols = list(schema["categorical"])
+
+    # only the model inputs are read
+    df = pd.read_parquet(args.data, columns=numeric_cols + categorical_cols)
+    reference = build_reference(df, numeric_cols, categorical_cols, n_bins=args.bins, source=str(args.data))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(reference, indent=1))
+    print(f"✅ drift reference for {len(reference['features'])} features ({len(df):,} rows) saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
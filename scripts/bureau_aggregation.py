@@ -1,55 +1,124 @@
+"""
+Aggregate bureau records to applicant grain.
+
+Full run (default): reads the raw CSV, writes bureau_agg.parquet and persists
+the mergeable per-applicant state next to it.
+
+Incremental run: folds only the new records of a delta file into the state
+and rewrites the affected applicants' rows. Deltas are append-only (new
+bureau records); a record whose status or amounts changed needs a full run.
+
+Usage:
+    python scripts/bureau_aggregation.py
+    python scripts/bureau_aggregation.py --delta data/raw/bureau_2024-06-02.csv
+    python scripts/bureau_aggregation.py --verify data/raw/bureau.csv data/raw/bureau_2024-06-02.csv
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
+
 import pandas as pd
-import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.data.aggregation import (  # noqa: E402
+    BUREAU_STATE_SPEC,
+    aggregate_bureau,
+    bureau_state,
+    compare_aggregates,
+    file_digest,
+    finalize_bureau,
+    fold_delta,
+    prepare_bureau,
+    read_raw,
+    read_state,
+    replace_rows,
+    write_parquet_atomic,
+    write_state,
+)
 
 # ---------- PATHS ----------
 RAW_DIR = Path("data/raw")
 OUT_DIR = Path("data/processed")
 
-# ---------- LOAD ----------
-bureau = pd.read_csv(RAW_DIR / "bureau.csv")
-
-# ---------- CLEAN ----------
-bureau = bureau.copy()
-bureau.columns = bureau.columns.str.lower()
-
-cols = [
-    "sk_id_curr",
-    "sk_id_bureau",
-    "credit_active",
-    "amt_credit_sum_debt",
-    "amt_credit_sum_overdue",
-    "amt_credit_max_overdue",
-]
-bureau = bureau[cols]
-
-# ---------- AGGREGATE ----------
-bureau_agg = (
-    bureau
-    .groupby("sk_id_curr")
-    .agg(
-        bureau_credit_cnt=("sk_id_bureau", "count"),
-        bureau_active_cnt=("credit_active", lambda x: (x == "Active").sum()),
-        bureau_closed_cnt=("credit_active", lambda x: (x == "Closed").sum()),
-        bureau_sum_debt=("amt_credit_sum_debt", "sum"),
-        bureau_sum_overdue=("amt_credit_sum_overdue", "sum"),
-        bureau_max_overdue=("amt_credit_max_overdue", "max"),
-    )
-    .reset_index()
-)
+IN_PATH = RAW_DIR / "bureau.csv"
+OUT_PATH = OUT_DIR / "bureau_agg.parquet"
+STATE_PATH = OUT_DIR / "state" / "bureau_state.parquet"
+
+
+def run_full(in_path: Path) -> None:
+    # ---------- LOAD + CLEAN ----------
+    bureau = prepare_bureau(read_raw(in_path))
+
+    # ---------- AGGREGATE (via mergeable state) ----------
+    state = bureau_state(bureau)
+    bureau_agg = finalize_bureau(state)
+
+    # ---------- SAVE ----------
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet_atomic(bureau_agg, OUT_PATH)
+    write_state(state, {"base": str(in_path), "rows": len(bureau), "deltas": []}, STATE_PATH)
+
+    print(f"✅ Bureau aggregation saved to {OUT_PATH} (state: {STATE_PATH})")
+    print(bureau_agg.head())
+
+
+def run_delta(delta_path: Path, force: bool) -> None:
+    if not STATE_PATH.exists():
+        raise FileNotFoundError(f"No state at {STATE_PATH}; run a full aggregation first")
+    state, manifest = read_state(STATE_PATH)
+    digest = file_digest(delta_path)
+    if not force and any(d["sha256"] == digest for d in manifest["deltas"]):
+        print(f"⚠️ {delta_path} was already applied; use --force to apply it again")
+        return
+
+    start = time.perf_counter()
+    delta = prepare_bureau(read_raw(delta_path))
+    state, touched = fold_delta(state, bureau_state(delta), BUREAU_STATE_SPEC)
+    bureau_agg = replace_rows(pd.read_parquet(OUT_PATH), finalize_bureau(touched))
+
+    # the output goes first: rerunning after a crash before the state commit
+    # recomputes the same rows from the old state, so only the state write
+    # (state + manifest, one rename) marks the delta as applied
+    write_parquet_atomic(bureau_agg, OUT_PATH)
+    manifest["deltas"].append({
+        "file": str(delta_path), "sha256": digest, "rows": len(delta),
+        "applicants": len(touched), "applied_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    write_state(state, manifest, STATE_PATH)
+
+    print(f"✅ {len(delta):,} delta records folded in; {len(touched):,} applicants updated "
+          f"in {OUT_PATH} ({time.perf_counter() - start:.1f}s)")
+
+
+def verify(raw_paths: list[Path]) -> None:
+    """Compare the current output with the reference full recompute over raw_paths."""
+    bureau = prepare_bureau(pd.concat([read_raw(p) for p in raw_paths], ignore_index=True))
+    mismatches = compare_aggregates(pd.read_parquet(OUT_PATH), aggregate_bureau(bureau))
+    if mismatches:
+        print(f"❌ {OUT_PATH} differs from a full recompute: {mismatches}")
+        sys.exit(1)
+    print(f"✅ {OUT_PATH} matches a full recompute over {len(raw_paths)} file(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=IN_PATH, help="raw CSV for a full run")
+    parser.add_argument("--delta", type=Path, help="new records (CSV or parquet) to fold into the state")
+    parser.add_argument("--force", action="store_true", help="apply a delta even if it was applied before")
+    parser.add_argument("--verify", type=Path, nargs="+", metavar="RAW",
+                        help="check the output against a full recompute of these raw files")
+    args = parser.parse_args()
+
+    if args.verify:
+        verify(args.verify)
+    elif args.delta:
+        run_delta(args.delta, args.force)
+    else:
+        run_full(args.input)
+
 
-# ---------- OPTIONAL: replace NaN with 0 for sums ----------
-num_cols = [
-    "bureau_sum_debt",
-    "bureau_sum_overdue",
-    "bureau_max_overdue",
-]
-bureau_agg[num_cols] = bureau_agg[num_cols].fillna(0)
-
-# ---------- SAVE ----------
-OUT_DIR.mkdir(exist_ok=True)
-out_path = OUT_DIR / "bureau_agg.parquet"
-bureau_agg.to_parquet(out_path, index=False)
-
-print(f"✅ Bureau aggregation saved to {out_path}")
-print(bureau_agg.head())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Clean the raw application and previous-application tables (the notebook 02
+steps, as a script so the pipeline can run it).
+
+Usage:
+    python scripts/clean_data.py
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.data.cleaning import clean_application, clean_previous_application  # noqa: E402
+
+# ---------- PATHS ----------
+RAW_DIR = Path("data/raw")
+OUT_DIR = Path("data/processed")
+
+
+def main() -> None:
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # ---------- previous_application ----------
+    prev = pd.read_csv(RAW_DIR / "previous_application.csv")
+    clean_previous_application(prev).to_parquet(OUT_DIR / "previous_application_clean.parquet", index=False)
+    del prev
+
+    # ---------- application train/test ----------
+    for name in ["application_train", "application_test"]:
+        app = pd.read_csv(RAW_DIR / f"{name}.csv")
+        clean_application(app).to_parquet(OUT_DIR / f"{name}_clean.parquet", index=False)
+        del app
+
+    print(f"✅ Cleaned data saved to {OUT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
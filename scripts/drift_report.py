@@ -0,0 +1,73 @@
+"""
+Drift report over the scoring audit log, across all API workers.
+
+Live histograms are kept in a small state file together with the list of
+audit files already counted, so each run only reads parquet files written
+since the previous one.
+
+Usage:
+    python scripts/drift_report.py                  # ingest new audit files, print report
+    python scripts/drift_report.py --reset          # start a new window
+    python scripts/drift_report.py --out reports/drift/latest.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from api.audit import AUDIT_DIR  # noqa: E402
+from api.drift import REFERENCE_PATH, DriftMonitor  # noqa: E402
+
+# ---------- CONFIG ----------
+STATE_PATH = BASE_DIR / "reports" / "drift" / "state.json"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audit-dir", type=Path, default=AUDIT_DIR)
+    parser.add_argument("--reference", type=Path, default=REFERENCE_PATH)
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    parser.add_argument("--reset", action="store_true", help="discard the saved histograms first")
+    parser.add_argument("--out", type=Path, default=None, help="also save the report as JSON")
+    args = parser.parse_args()
+
+    monitor = DriftMonitor.load(args.reference)
+    seen: set[str] = set()
+    if args.state.exists() and not args.reset:
+        state = json.loads(args.state.read_text())
+        monitor.load_counts(state["counts"], state["rows"], state.get("since"))
+        seen = set(state["files"])
+
+    # only closed files: open ones still carry the .parquet.tmp suffix
+    new_files = sorted(p for p in args.audit_dir.glob("date=*/*.parquet") if str(p) not in seen)
+    added = monitor.update_from_audit(new_files)
+
+    args.state.parent.mkdir(parents=True, exist_ok=True)
+    args.state.write_text(json.dumps({
+        "rows": monitor.rows,
+        "since": monitor.since.isoformat(),
+        "counts": {c: v.tolist() for c, v in monitor.counts().items()},
+        "files": sorted(seen | {str(p) for p in new_files}),
+    }))
+
+    report = monitor.report()
+    print(f"audit rows added: {added:,} from {len(new_files)} file(s); window total: {report['rows']:,}")
+    print(f"{'feature':<28}{'psi':>10}{'ks':>10}{'missing':>10}  status")
+    for r in report["features"]:
+        psi = "-" if r["psi"] is None else f"{r['psi']:.4f}"
+        ks = "-" if r["ks"] is None else f"{r['ks']:.4f}"
+        print(f"{r['feature']:<28}{psi:>10}{ks:>10}{r['missing_share_live']:>10.3f}  {r['status'] or '-'}")
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Export models/model.joblib to the compact scoring artifact in models/compact/
+(model.json + model.npz, see api/compact.py). The API scores with it when
+started with MODEL_FORMAT=compact.
+
+--check scores one frame with both the pipeline and the compact model and
+fails when any probability differs by more than --tolerance. The frame holds
+synthetic applicants around the training fill values, with missing values,
+unseen categories and values placed exactly on the trees' split
+thresholds, plus the rows of --check-data when given.
+
+Usage:
+    python scripts/export_compact_model.py
+    python scripts/export_compact_model.py --check
+    python scripts/export_compact_model.py --check --check-data data/processed/application_train_features.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from api.compact import ARRAYS_FILE, SCHEMA_FILE, CompactModel, export_compact, load_compact  # noqa: E402
+from api.model import COMPACT_DIR, MODEL_PATH  # noqa: E402
+
+# ---------- CONFIG ----------
+CHECK_ROWS = 20_000
+TOLERANCE = 1e-6  # float32 leaves summed over a few hundred trees stay well inside this
+
+
+def parity_frame(model: CompactModel, n: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic raw rows that exercise fills, unknown categories and exact split thresholds."""
+    rng = np.random.default_rng(seed)
+    is_split = model._left != np.arange(len(model._left))
+    cols = {}
+    for col in model.schema["columns"]:
+        if col["kind"] == "numeric":
+            values = (abs(col["fill"]) or 1.0) * rng.lognormal(0, 0.5, n) * rng.choice([-1, 1], n, p=[0.1, 0.9])
+            thresholds = model._threshold[is_split & (model._feature == col["start"])]
+            if len(thresholds):
+                on_split = rng.random(n) < 0.3
+                values[on_split] = rng.choice(thresholds, on_split.sum())
+            values[rng.random(n) < 0.1] = np.nan
+            cols[col["name"]] = values
+        else:
+            choices = np.array(col["categories"] + ["__unseen__", np.nan, None], dtype=object)
+            cols[col["name"]] = rng.choice(choices, n)
+    return pd.DataFrame(cols)
+
+
+def check_parity(pipeline, model: CompactModel, frame: pd.DataFrame, tolerance: float) -> bool:
+    t0 = time.perf_counter()
+    expected = pipeline.predict_proba(frame)[:, 1]
+    t1 = time.perf_counter()
+    actual = model.predict_proba(frame)[:, 1]
+    t2 = time.perf_counter()
+
+    diff = np.abs(expected - actual)
+    ok = bool(diff.max() <= tolerance)
+    print(f"  {'✅' if ok else '❌'} {len(frame):,} rows: max |Δp| {diff.max():.2e} "
+          f"(mean {diff.mean():.2e}, tolerance {tolerance:.0e}); "
+          f"pipeline {t1 - t0:.3f}s, compact {t2 - t1:.3f}s")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--out", type=Path, default=COMPACT_DIR)
+    parser.add_argument("--check", action="store_true", help="compare compact and pipeline probabilities")
+    parser.add_argument("--check-rows", type=int, default=CHECK_ROWS)
+    parser.add_argument("--check-data", type=Path, default=None, help="parquet with the raw feature columns")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    # ---------- EXPORT ----------
+    t0 = time.perf_counter()
+    pipeline = joblib.load(args.model)
+    joblib_s = time.perf_counter() - t0
+    schema = export_compact(pipeline, args.out, source=args.model)
+
+    t0 = time.perf_counter()
+    model = load_compact(args.out)
+    compact_s = time.perf_counter() - t0
+
+    size_kb = sum((args.out / f).stat().st_size for f in (SCHEMA_FILE, ARRAYS_FILE)) / 1024
+    print(f"✅ {schema['n_trees']} trees, {len(schema['columns'])} columns -> {args.out} ({size_kb:,.0f} KB, "
+          f"joblib {args.model.stat().st_size / 1024:,.0f} KB)")
+    print(f"Load time: joblib {joblib_s * 1000:.1f} ms, compact {compact_s * 1000:.1f} ms")
+
+    # ---------- PARITY ----------
+    if args.check:
+        print("\nParity with the pipeline:")
+        frames = [parity_frame(model, args.check_rows)]
+        if args.check_data:
+            frames.append(pd.read_parquet(args.check_data, columns=model.features))
+        results = [check_parity(pipeline, model, frame, args.tolerance) for frame in frames]
+        if not all(results):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
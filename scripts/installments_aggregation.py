@@ -1,67 +1,123 @@
+"""
+Aggregate installment payments to applicant grain.
+
+Full run (default): reads the raw CSV, writes installments_agg.parquet and
+persists the mergeable per-applicant state next to it.
+
+Incremental run: folds only the new rows of a delta file into the state and
+rewrites the affected applicants' rows. Deltas are append-only (new
+payments); a revised or deleted historical row needs a full run.
+
+Usage:
+    python scripts/installments_aggregation.py
+    python scripts/installments_aggregation.py --delta data/raw/installments_2024-06-02.csv
+    python scripts/installments_aggregation.py --verify data/raw/installments_payments.csv data/raw/installments_2024-06-02.csv
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
+
 import pandas as pd
-import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.data.aggregation import (  # noqa: E402
+    INSTALLMENTS_STATE_SPEC,
+    aggregate_installments,
+    compare_aggregates,
+    file_digest,
+    finalize_installments,
+    fold_delta,
+    installments_state,
+    prepare_installments,
+    read_raw,
+    read_state,
+    replace_rows,
+    write_parquet_atomic,
+    write_state,
+)
 
 RAW_DIR = Path("data/raw")
 OUT_DIR = Path("data/processed")
 
 IN_PATH = RAW_DIR / "installments_payments.csv"
 OUT_PATH = OUT_DIR / "installments_agg.parquet"
+STATE_PATH = OUT_DIR / "state" / "installments_state.parquet"
 
 
-def main() -> None:
+def run_full(in_path: Path) -> None:
     # ---------- LOAD ----------
-    inst = pd.read_csv(IN_PATH)
-
-    # ---------- CLEAN ----------
-    inst = inst.copy()
-    inst.columns = inst.columns.str.lower()
-
-    cols = [
-        "sk_id_curr",
-        "sk_id_prev",
-        "amt_instalment",
-        "amt_payment",
-        "days_instalment",
-        "days_entry_payment",
-    ]
-    inst = inst[cols]
-
-    # ---------- FEATURE ENGINEERING ----------
-    inst["late_days"] = inst["days_entry_payment"] - inst["days_instalment"]
-
-    inst["late_flag"] = (inst["late_days"] > 0).astype("int")
-
-    inst["payment_ratio"] = inst["amt_payment"] / inst["amt_instalment"].replace(0, np.nan)
-
-    # ---------- AGGREGATE (to applicant grain) ----------
-    agg = (
-        inst.groupby("sk_id_curr")
-        .agg(
-            inst_pay_cnt=("sk_id_prev", "count"),
-            inst_late_cnt=("late_flag", "sum"),
-            inst_late_rate=("late_flag", "mean"),
-            inst_days_late_mean=("late_days", lambda x: x[x > 0].mean()),
-            inst_days_late_max=("late_days", lambda x: x[x > 0].max()),
-            inst_amt_payment_sum=("amt_payment", "sum"),
-            inst_amt_instalment_sum=("amt_instalment", "sum"),
-            inst_payment_ratio_mean=("payment_ratio", "mean"),
-        )
-        .reset_index()
-    )
-
-    agg["inst_days_late_mean"] = agg["inst_days_late_mean"].fillna(0)
-    agg["inst_days_late_max"] = agg["inst_days_late_max"].fillna(0)
-
-    agg["inst_payment_ratio_mean"] = agg["inst_payment_ratio_mean"].fillna(0)
+    inst = prepare_installments(read_raw(in_path))
+
+    # ---------- AGGREGATE (to applicant grain, via mergeable state) ----------
+    state = installments_state(inst)
+    agg = finalize_installments(state)
 
     # ---------- SAVE ----------
-    OUT_DIR.mkdir(exist_ok=True)
-    agg.to_parquet(OUT_PATH, index=False)
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet_atomic(agg, OUT_PATH)
+    write_state(state, {"base": str(in_path), "rows": len(inst), "deltas": []}, STATE_PATH)
 
-    print(f"✅ Installments aggregation saved to {OUT_PATH}")
+    print(f"✅ Installments aggregation saved to {OUT_PATH} (state: {STATE_PATH})")
     print(agg.head())
 
 
+def run_delta(delta_path: Path, force: bool) -> None:
+    if not STATE_PATH.exists():
+        raise FileNotFoundError(f"No state at {STATE_PATH}; run a full aggregation first")
+    state, manifest = read_state(STATE_PATH)
+    digest = file_digest(delta_path)
+    if not force and any(d["sha256"] == digest for d in manifest["deltas"]):
+        print(f"⚠️ {delta_path} was already applied; use --force to apply it again")
+        return
+
+    start = time.perf_counter()
+    delta = prepare_installments(read_raw(delta_path))
+    state, touched = fold_delta(state, installments_state(delta), INSTALLMENTS_STATE_SPEC)
+    agg = replace_rows(pd.read_parquet(OUT_PATH), finalize_installments(touched))
+
+    # the output goes first: rerunning after a crash before the state commit
+    # recomputes the same rows from the old state, so only the state write
+    # (state + manifest, one rename) marks the delta as applied
+    write_parquet_atomic(agg, OUT_PATH)
+    manifest["deltas"].append({
+        "file": str(delta_path), "sha256": digest, "rows": len(delta),
+        "applicants": len(touched), "applied_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    write_state(state, manifest, STATE_PATH)
+
+    print(f"✅ {len(delta):,} delta rows folded in; {len(touched):,} applicants updated "
+          f"in {OUT_PATH} ({time.perf_counter() - start:.1f}s)")
+
+
+def verify(raw_paths: list[Path]) -> None:
+    """Compare the current output with the reference full recompute over raw_paths."""
+    inst = prepare_installments(pd.concat([read_raw(p) for p in raw_paths], ignore_index=True))
+    mismatches = compare_aggregates(pd.read_parquet(OUT_PATH), aggregate_installments(inst))
+    if mismatches:
+        print(f"❌ {OUT_PATH} differs from a full recompute: {mismatches}")
+        sys.exit(1)
+    print(f"✅ {OUT_PATH} matches a full recompute over {len(raw_paths)} file(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=IN_PATH, help="raw CSV for a full run")
+    parser.add_argument("--delta", type=Path, help="new rows (CSV or parquet) to fold into the state")
+    parser.add_argument("--force", action="store_true", help="apply a delta even if it was applied before")
+    parser.add_argument("--verify", type=Path, nargs="+", metavar="RAW",
+                        help="check the output against a full recompute of these raw files")
+    args = parser.parse_args()
+
+    if args.verify:
+        verify(args.verify)
+    elif args.delta:
+        run_delta(args.delta, args.force)
+    else:
+        run_full(args.input)
+
+
 if __name__ == "__main__":
     main()
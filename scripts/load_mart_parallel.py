@@ -0,0 +1,179 @@
+"""
+Load every mart table at once: the three mart tables built by
+scripts/load_to_postgres.py plus the bureau / installments staging tables.
+
+The tables do not depend on each other, so each one is loaded by its own
+thread on its own pooled connection (src/database.py): truncate, drop its
+constraints and indexes, COPY, rebuild them, all in one transaction per
+table. Total wall time is then close to the slowest single table instead of
+the sum of all of them. A table that fails rolls back on its own; the others
+still commit.
+
+Before loading, every table is checked against the constraints declared in
+sql/01_schema.sql (src/data/validation.py); violating rows are written to
+data/quarantine/ and left out, so a load never fails half-way.
+
+Usage:
+    python scripts/load_mart_parallel.py
+    python scripts/load_mart_parallel.py --tables dim_customer stg_bureau_agg
+    python scripts/load_mart_parallel.py --workers 1      # sequential baseline
+    python scripts/load_mart_parallel.py --validate-only  # quarantine report, no database
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from scripts.load_to_postgres import (  # noqa: E402
+    build_dim_customer,
+    build_fact_application,
+    build_fact_previous_loans,
+    print_row_counts,
+    read_applications,
+    read_previous,
+)
+from src.data.validation import load_schema_rules, quarantine_invalid  # noqa: E402
+from src.database import MAX_OVERFLOW, POOL_SIZE, get_engine, load_frame  # noqa: E402
+
+# ---------- CONFIG ----------
+SCHEMA = "mart"
+BUREAU_AGG_PATH = Path("data/processed/bureau_agg.parquet")
+INSTALLMENTS_AGG_PATH = Path("data/processed/installments_agg.parquet")
+
+MART_TABLES = ["fact_application", "dim_customer", "fact_previous_loans"]
+STAGING_TABLES = {
+    "stg_bureau_agg": BUREAU_AGG_PATH,
+    "stg_installments_agg": INSTALLMENTS_AGG_PATH,
+}
+ALL_TABLES = MART_TABLES + list(STAGING_TABLES)
+
+
+# ---------- BUILD ----------
+def build_frames(tables: list[str], workers: int) -> dict[str, pd.DataFrame]:
+    """Read the inputs concurrently (parquet reads release the GIL), then build each table."""
+    sources = {}
+    if {"fact_application", "dim_customer"} & set(tables):
+        sources["applications"] = read_applications
+    if "fact_previous_loans" in tables:
+        sources["previous"] = read_previous
+    for table, path in STAGING_TABLES.items():
+        if table in tables:
+            sources[table] = lambda path=path: pd.read_parquet(path)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(fn) for name, fn in sources.items()}
+        inputs = {name: f.result() for name, f in futures.items()}
+
+    frames = {}
+    if "fact_application" in tables:
+        frames["fact_application"] = build_fact_application(inputs["applications"])
+    if "dim_customer" in tables:
+        frames["dim_customer"] = build_dim_customer(inputs["applications"])
+    if "fact_previous_loans" in tables:
+        frames["fact_previous_loans"] = build_fact_previous_loans(inputs["previous"])
+    for table in STAGING_TABLES:
+        if table in tables:
+            frames[table] = inputs[table]
+    return frames
+
+
+# ---------- LOAD ----------
+def validate_table(df: pd.DataFrame, table: str, rules) -> tuple[pd.DataFrame, dict]:
+    t0 = time.perf_counter()
+    df, summary = quarantine_invalid(df, f"{SCHEMA}.{table}", rules)
+    summary["validate_s"] = round(time.perf_counter() - t0, 3)
+    if summary["quarantined"]:
+        print(f"  ⚠️ {SCHEMA}.{table}: {summary['quarantined']:,} rows quarantined to {summary['path']} "
+              f"{summary['by_rule']}")
+    return df, summary
+
+
+def validate_and_load(engine, df: pd.DataFrame, table: str, rules) -> dict:
+    df, summary = validate_table(df, table, rules)
+    stats = load_frame(engine, df, table, SCHEMA, create=table in STAGING_TABLES)
+    return {**stats, "quarantined": summary["quarantined"], "validate_s": summary["validate_s"]}
+
+
+def load_all(engine, frames: dict[str, pd.DataFrame], workers: int, rules) -> tuple[list[dict], dict[str, str]]:
+    """Validate and load every frame on its own connection; returns per-table stats and errors."""
+    stats, errors = [], {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as pool:
+        futures = {
+            pool.submit(validate_and_load, engine, df, table, rules): table
+            for table, df in frames.items()
+        }
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                stats.append(future.result())
+                print(f"  ✅ {SCHEMA}.{table} ({stats[-1]['rows']:,} rows, {stats[-1]['total_s']:.2f}s)")
+            except Exception as exc:  # one table failing must not hide the others
+                errors[table] = f"{type(exc).__name__}: {exc}"
+                print(f"  ❌ {SCHEMA}.{table}: {errors[table]}")
+    return stats, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", nargs="+", choices=ALL_TABLES, default=ALL_TABLES)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="concurrent table loads (default: one per table, capped by the pool size)")
+    parser.add_argument("--report", type=Path, default=None, help="write the timings as JSON")
+    parser.add_argument("--validate-only", action="store_true",
+                        help="check the tables and write the quarantine files without touching the database")
+    args = parser.parse_args()
+
+    workers = max(1, min(args.workers or len(args.tables), POOL_SIZE + MAX_OVERFLOW))
+
+    t0 = time.perf_counter()
+    frames = build_frames(args.tables, workers)
+    build_s = time.perf_counter() - t0
+    print(f"Built {len(frames)} tables in {build_s:.2f}s")
+    rules = load_schema_rules()
+
+    if args.validate_only:
+        summaries = [validate_table(df, table, rules)[1] for table, df in frames.items()]
+        print(pd.DataFrame(summaries)[["table", "rows", "quarantined", "validate_s"]].to_string(index=False))
+        return
+
+    engine = get_engine()
+    t1 = time.perf_counter()
+    stats, errors = load_all(engine, frames, workers, rules)
+    load_s = time.perf_counter() - t1
+
+    # ---------- REPORT ----------
+    if stats:
+        report = pd.DataFrame(stats).sort_values("total_s", ascending=False)
+        print()
+        print(report.to_string(index=False))
+        slowest = report["total_s"].max()
+        print(f"\nLoad wall time {load_s:.2f}s with {workers} workers "
+              f"(slowest table {slowest:.2f}s, sum of tables {report['total_s'].sum():.2f}s)")
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps({
+            "workers": workers,
+            "build_s": round(build_s, 3),
+            "load_wall_s": round(load_s, 3),
+            "tables": stats,
+            "errors": errors,
+        }, indent=2))
+
+    if errors:
+        sys.exit(1)
+
+    if set(MART_TABLES) <= set(frames):
+        print_row_counts(engine)
+
+
+if __name__ == "__main__":
+    main()
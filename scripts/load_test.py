@@ -0,0 +1,288 @@
+"""
+Load generator for the scoring API.
+
+Replays {"features": ...} payloads from an NDJSON file, or synthesizes them
+from the fitted model's feature schema, against /predict (or /predict/batch)
+and reports throughput, error rate and latency percentiles.
+
+Two ways to reach the API, both local:
+  --mode http   async HTTP against a running server (uvicorn or api.serve)
+  --mode asgi   in-process through the ASGI app, no server or sockets
+
+Two ways to drive it:
+  --concurrency N   closed loop: N clients send back-to-back
+  --rps R           open loop: requests start on a fixed schedule; latency is
+                    measured from the scheduled start, so a slow server cannot
+                    hide its queueing delay (no coordinated omission)
+
+Usage:
+    python scripts/load_test.py --mode asgi --concurrency 8 --duration 20
+    python scripts/load_test.py --url http://127.0.0.1:8000 --rps 200 --duration 30 \\
+        --payloads applicants.jsonl --out reports/loadtest/release.json
+    python scripts/load_test.py ... --compare reports/loadtest/release.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+# ---------- CONFIG ----------
+API_URL = "http://127.0.0.1:8000"
+RESULTS_DIR = BASE_DIR / "reports" / "loadtest"
+PERCENTILES = [50, 95, 99, 99.9]
+# log-spaced latency buckets (ms) for the histogram
+HIST_EDGES_MS = np.geomspace(0.1, 60_000, 43)
+
+
+# ---------- PAYLOADS ----------
+def load_payloads(path: Path | None, n_synthetic: int, seed: int = 0) -> list[dict]:
+    if path is not None:
+        payloads = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if isinstance(obj, dict) and isinstance(obj.get("features"), dict):
+                    payloads.append(obj["features"])
+        if not payloads:
+            raise ValueError(f"No {{'features': ...}} records found in {path}")
+        return payloads
+
+    from api.model import sample_features
+
+    return sample_features(n_synthetic, seed=seed)
+
+
+def make_bodies(features: list[dict], batch_size: int) -> list[bytes]:
+    """Pre-encode request bodies so JSON encoding is not part of the measurement."""
+    if batch_size <= 1:
+        return [json.dumps({"features": f}).encode() for f in features]
+    return [
+        json.dumps({"records": [{"features": f} for f in features[i:i + batch_size]]}).encode()
+        for i in range(0, len(features), batch_size)
+    ]
+
+
+# ---------- DRIVER ----------
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies_ms: list[float] = []
+        self.errors: dict[str, int] = {}
+        self.ok = 0
+
+    def record(self, latency_s: float, error: str | None) -> None:
+        self.latencies_ms.append(latency_s * 1000)
+        if error is None:
+            self.ok += 1
+        else:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+
+async def _send(client: httpx.AsyncClient, path: str, body: bytes, rec: Recorder, started: float) -> None:
+    error = None
+    try:
+        resp = await client.post(path, content=body, headers={"Content-Type": "application/json"})
+        await resp.aread()
+        if resp.status_code != 200:
+            error = f"HTTP {resp.status_code}"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    rec.record(time.perf_counter() - started, error)
+
+
+async def run_closed_loop(client, path, bodies, concurrency, deadline, max_requests, rec):
+    counter = 0
+
+    async def worker() -> None:
+        nonlocal counter
+        while time.perf_counter() < deadline and (max_requests is None or counter < max_requests):
+            body = bodies[counter % len(bodies)]
+            counter += 1
+            await _send(client, path, body, rec, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open_loop(client, path, bodies, rps, deadline, max_requests, max_inflight, rec):
+    interval = 1.0 / rps
+    start = time.perf_counter()
+    inflight = asyncio.Semaphore(max_inflight)
+    tasks = set()
+    i = 0
+
+    async def fire(body: bytes, scheduled: float) -> None:
+        async with inflight:
+            await _send(client, path, body, rec, scheduled)
+
+    while max_requests is None or i < max_requests:
+        scheduled = start + i * interval
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(fire(bodies[i % len(bodies)], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        i += 1
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def make_client(args) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.max_inflight), max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+    if args.mode == "asgi":
+        from api.main import app
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://asgi", timeout=timeout)
+    return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+
+
+async def run(args, bodies: list[bytes]) -> tuple[Recorder, float]:
+    path = "/predict/batch" if args.batch_size > 1 else "/predict"
+
+    async with make_client(args) as client:
+        if args.warmup > 0:
+            warm = Recorder()
+            await run_closed_loop(client, path, bodies, args.concurrency, time.perf_counter() + args.warmup, None, warm)
+
+        rec = Recorder()
+        deadline = time.perf_counter() + args.duration if args.duration else float("inf")
+        start = time.perf_counter()
+        if args.rps:
+            await run_open_loop(client, path, bodies, args.rps, deadline, args.requests, args.max_inflight, rec)
+        else:
+            await run_closed_loop(client, path, bodies, args.concurrency, deadline, args.requests, rec)
+        elapsed = time.perf_counter() - start
+    return rec, elapsed
+
+
+# ---------- REPORT ----------
+def summarize(rec: Recorder, elapsed: float, args) -> dict:
+    lat = np.asarray(rec.latencies_ms)
+    total = len(lat)
+    n_err = sum(rec.errors.values())
+    counts, _ = np.histogram(lat, bins=HIST_EDGES_MS) if total else (np.zeros(len(HIST_EDGES_MS) - 1), None)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "config": {
+            "mode": args.mode,
+            "url": args.url if args.mode == "http" else None,
+            "concurrency": None if args.rps else args.concurrency,
+            "target_rps": args.rps,
+            "batch_size": args.batch_size,
+            "duration_s": args.duration,
+            "payloads": str(args.payloads) if args.payloads else f"synthetic:{args.synthetic}",
+            "host": platform.node(),
+        },
+        "requests": total,
+        "ok": rec.ok,
+        "errors": n_err,
+        "error_rate_pct": round(n_err / total * 100, 3) if total else None,
+        "error_kinds": rec.errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else None,
+        "throughput_records_per_s": round(total * max(args.batch_size, 1) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            **{f"p{p:g}": round(float(np.percentile(lat, p)), 3) for p in PERCENTILES},
+            "mean": round(float(lat.mean()), 3),
+            "max": round(float(lat.max()), 3),
+        } if total else {},
+        "histogram_ms": {"edges": [round(float(e), 4) for e in HIST_EDGES_MS], "counts": [int(c) for c in counts]},
+    }
+
+
+def print_summary(summary: dict) -> None:
+    cfg = summary["config"]
+    drive = f"{cfg['target_rps']} rps target" if cfg["target_rps"] else f"concurrency {cfg['concurrency']}"
+    print(f"mode={cfg['mode']}  {drive}  batch_size={cfg['batch_size']}  payloads={cfg['payloads']}")
+    print(f"requests: {summary['requests']}  ok: {summary['ok']}  errors: {summary['errors']} "
+          f"({summary['error_rate_pct']}%)  {summary['error_kinds'] or ''}")
+    print(f"throughput: {summary['throughput_rps']} req/s ({summary['throughput_records_per_s']} records/s)")
+    lat = summary["latency_ms"]
+    if lat:
+        print("latency ms: " + "  ".join(f"{k}={v}" for k, v in lat.items()))
+
+    counts = summary["histogram_ms"]["counts"]
+    edges = summary["histogram_ms"]["edges"]
+    peak = max(counts) if counts and max(counts) else 1
+    nonzero = [i for i, c in enumerate(counts) if c]
+    if nonzero:
+        print("histogram (ms):")
+        for i in range(nonzero[0], nonzero[-1] + 1):
+            bar = "#" * int(round(counts[i] / peak * 40))
+            print(f"  {edges[i]:>9.2f} – {edges[i + 1]:>9.2f} | {counts[i]:>7} {bar}")
+
+
+def print_comparison(current: dict, baseline: dict) -> None:
+    print(f"\ncompared to {baseline.get('label') or 'baseline'} ({baseline.get('timestamp')}):")
+    rows = [("throughput_rps", current["throughput_rps"], baseline["throughput_rps"]),
+            ("error_rate_pct", current["error_rate_pct"], baseline["error_rate_pct"])]
+    for k, v in current["latency_ms"].items():
+        rows.append((f"latency {k}", v, baseline.get("latency_ms", {}).get(k)))
+    for name, cur, base in rows:
+        if cur is None or base is None:
+            continue
+        delta = f"{(cur - base) / base * 100:+.1f}%" if base else "n/a"
+        print(f"  {name:<16}{base:>12}{cur:>12}{delta:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["http", "asgi"], default="http")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--payloads", type=Path, default=None, help="NDJSON of {'features': ...}; default: synthesize")
+    parser.add_argument("--synthetic", type=int, default=1000, help="number of synthetic payloads")
+    parser.add_argument("--batch-size", type=int, default=1, help=">1 sends /predict/batch with this many records")
+    drive = parser.add_mutually_exclusive_group()
+    drive.add_argument("--concurrency", type=int, default=8)
+    drive.add_argument("--rps", type=float, default=None)
+    parser.add_argument("--max-inflight", type=int, default=256, help="open-loop cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=20, help="seconds (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=None)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--out", type=Path, default=None, help="results JSON (default: reports/loadtest/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    features = load_payloads(args.payloads, args.synthetic)
+    bodies = make_bodies(features, args.batch_size)
+
+    rec, elapsed = asyncio.run(run(args, bodies))
+    summary = summarize(rec, elapsed, args)
+    print_summary(summary)
+
+    out = args.out or RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(summary, indent=2))
+    print(f"\n✅ results saved to {out}")
+
+    if args.compare:
+        print_comparison(summary, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
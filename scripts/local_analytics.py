@@ -0,0 +1,116 @@
+"""
+Build the dashboard exports straight from data/processed/ with pyarrow, no
+Postgres needed: the sql/04_analytics.sql segments (plus v_kpi_segment), the
+customer profile extract of notebook 06 and, optionally, the
+v_application_enriched join.
+
+Usage:
+    python scripts/local_analytics.py
+    python scripts/local_analytics.py --enriched-out dashboard/application_enriched.parquet
+    python scripts/local_analytics.py --check-sql     # compare every segment with the SQL on the mart
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.analytics import (  # noqa: E402
+    PROCESSED_DIR,
+    SEGMENTS,
+    application_enriched,
+    compare_segment,
+    customer_profile_eda,
+    run_segments,
+    segment_sql,
+)
+
+# ---------- CONFIG ----------
+BASE_DIR = Path(__file__).resolve().parents[1]
+OUT_DIR = BASE_DIR / "dashboard"
+ANALYTICS_SQL = BASE_DIR / "sql" / "04_analytics.sql"
+
+
+def check_sql(results: dict[str, pd.DataFrame]) -> bool:
+    """Run each segment's SQL on the mart and compare; True when all match."""
+    from sqlalchemy import text
+
+    from scripts.run_sql import split_statements
+    from src.database import get_engine
+
+    statements = split_statements(ANALYTICS_SQL.read_text())
+    ok = True
+    with get_engine().connect() as conn:
+        for segment in SEGMENTS:
+            expected = pd.read_sql(text(segment_sql(segment, statements)), conn)
+            problems = compare_segment(results[segment.name], expected, segment.keys)
+            if problems:
+                ok = False
+                print(f"  ❌ {segment.name}: {'; '.join(problems)}")
+            else:
+                print(f"  ✅ {segment.name} ({len(expected)} rows)")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, default=PROCESSED_DIR)
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--enriched-out", type=Path, default=None,
+                        help="also write v_application_enriched (.parquet or .csv)")
+    parser.add_argument("--threads", type=int, default=None, help="Arrow CPU threads (default: all cores)")
+    parser.add_argument("--check-sql", action="store_true", help="compare every segment with the SQL on the mart")
+    args = parser.parse_args()
+
+    if args.threads:
+        pa.set_cpu_count(args.threads)
+
+    timings = {}
+
+    # ---------- SEGMENTS ----------
+    t0 = time.perf_counter()
+    results = run_segments(args.data_dir)
+    seg_dir = args.out_dir / "segments"
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    for name, df in results.items():
+        df.to_csv(seg_dir / f"{name}.csv", index=False)
+    timings["segments"] = time.perf_counter() - t0
+    print(f"✅ {len(results)} segment tables -> {seg_dir}")
+
+    # ---------- CUSTOMER PROFILE ----------
+    t0 = time.perf_counter()
+    profile = customer_profile_eda(args.data_dir)
+    profile.to_csv(args.out_dir / "customer_profile_eda.csv", index=False)
+    timings["customer_profile_eda"] = time.perf_counter() - t0
+    print(f"✅ customer_profile_eda.csv ({len(profile):,} rows)")
+
+    # ---------- ENRICHED ----------
+    if args.enriched_out:
+        t0 = time.perf_counter()
+        enriched = application_enriched(args.data_dir)
+        args.enriched_out.parent.mkdir(parents=True, exist_ok=True)
+        if args.enriched_out.suffix == ".csv":
+            pacsv.write_csv(enriched, args.enriched_out)
+        else:
+            pq.write_table(enriched, args.enriched_out)
+        timings["application_enriched"] = time.perf_counter() - t0
+        print(f"✅ v_application_enriched ({enriched.num_rows:,} rows) -> {args.enriched_out}")
+
+    print("\n" + "  ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+
+    if args.check_sql:
+        print("\nParity with the SQL on the mart:")
+        if not check_sql(results):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Run the data pipeline as a DAG of cached stages.
+
+Every stage declares its command, the code it runs, the files it reads and
+the files it writes. A stage's fingerprint is a content hash of its code,
+its input files and the fingerprints of the stages it depends on. A stage
+is skipped when its fingerprint matches the last successful run and its
+outputs still exist. Independent branches (e.g. bureau and installments)
+run in parallel.
+
+Each stage runs as a child process with its output in .pipeline/logs/. The
+run ends with a per-stage report of wall time, CPU time and peak RSS.
+
+Usage:
+    python scripts/pipeline.py                      # run everything that is out of date
+    python scripts/pipeline.py load                 # only that stage and what it needs
+    python scripts/pipeline.py --no-db              # file stages only (no Postgres)
+    python scripts/pipeline.py --force bureau_agg   # rerun a stage (and its dependents)
+    python scripts/pipeline.py --dry-run            # show what would run
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+# ---------- CONFIG ----------
+STATE_DIR = BASE_DIR / ".pipeline"
+STATE_PATH = STATE_DIR / "state.json"
+LOG_DIR = STATE_DIR / "logs"
+REPORT_PATH = STATE_DIR / "last_run.json"
+
+RAW = Path("data/raw")
+PROCESSED = Path("data/processed")
+
+
+@dataclass
+class Stage:
+    name: str
+    cmd: list[str]
+    code: list[Path]
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)  # ordering without a file artifact (database state)
+    db: bool = False
+
+
+# ---------- STAGES ----------
+STAGES = [
+    Stage(
+        "clean",
+        ["scripts/clean_data.py"],
+        code=[Path("scripts/clean_data.py"), Path("src/data/cleaning.py")],
+        inputs=[RAW / "application_train.csv", RAW / "application_test.csv", RAW / "previous_application.csv"],
+        outputs=[PROCESSED / "application_train_clean.parquet", PROCESSED / "application_test_clean.parquet",
+                 PROCESSED / "previous_application_clean.parquet"],
+    ),
+    Stage(
+        "bureau_agg",
+        ["scripts/bureau_aggregation.py"],
+        code=[Path("scripts/bureau_aggregation.py"), Path("src/data/aggregation.py")],
+        inputs=[RAW / "bureau.csv"],
+        outputs=[PROCESSED / "bureau_agg.parquet", PROCESSED / "state" / "bureau_state.parquet"],
+    ),
+    Stage(
+        "installments_agg",
+        ["scripts/installments_aggregation.py"],
+        code=[Path("scripts/installments_aggregation.py"), Path("src/data/aggregation.py")],
+        inputs=[RAW / "installments_payments.csv"],
+        outputs=[PROCESSED / "installments_agg.parquet", PROCESSED / "state" / "installments_state.parquet"],
+    ),
+    Stage(
+        # dashboard exports straight from the parquet; no database needed
+        "dashboard",
+        ["scripts/local_analytics.py"],
+        code=[Path("scripts/local_analytics.py"), Path("src/analytics.py")],
+        inputs=[PROCESSED / "application_train_clean.parquet", PROCESSED / "application_test_clean.parquet",
+                PROCESSED / "previous_application_clean.parquet", PROCESSED / "bureau_agg.parquet",
+                PROCESSED / "installments_agg.parquet"],
+        outputs=[Path("dashboard/customer_profile_eda.csv"), Path("dashboard/segments/risk_tier.csv")],
+    ),
+    Stage(
+        "train",
+        ["scripts/train_model.py"],
+        code=[Path("scripts/train_model.py"), Path("src/data/features.py"), Path("src/model_training.py"),
+              Path("src/model_evaluation.py")],
+        inputs=[PROCESSED / "application_train_clean.parquet", PROCESSED / "bureau_agg.parquet"],
+        outputs=[Path("models/model.joblib"), Path("dashboard/score_band_summary.csv"),
+                 Path("dashboard/policy_summary.csv")],
+    ),
+    Stage(
+        "compact",
+        ["scripts/export_compact_model.py", "--check"],
+        code=[Path("scripts/export_compact_model.py"), Path("api/compact.py")],
+        inputs=[Path("models/model.joblib")],
+        outputs=[Path("models/compact/model.json"), Path("models/compact/model.npz")],
+    ),
+    Stage(
+        "schema",
+        ["scripts/run_sql.py", "sql/01_schema.sql", "sql/06_audit.sql"],
+        code=[Path("scripts/run_sql.py"), Path("src/database.py"), Path("sql/01_schema.sql"), Path("sql/06_audit.sql")],
+        db=True,
+    ),
+    Stage(
+        # the three mart tables and both staging tables, loaded concurrently
+        "load",
+        ["scripts/load_mart_parallel.py"],
+        code=[Path("scripts/load_mart_parallel.py"), Path("scripts/load_to_postgres.py"), Path("src/database.py"),
+              Path("src/data/validation.py"), Path("sql/01_schema.sql")],
+        inputs=[PROCESSED / "application_train_clean.parquet", PROCESSED / "application_test_clean.parquet",
+                PROCESSED / "previous_application_clean.parquet", PROCESSED / "bureau_agg.parquet",
+                PROCESSED / "installments_agg.parquet"],
+        after=["schema"],
+        db=True,
+    ),
+    Stage(
+        "views",
+        ["scripts/run_sql.py", "sql/02_views.sql", "sql/05_views.sql"],
+        code=[Path("scripts/run_sql.py"), Path("src/database.py"), Path("sql/02_views.sql"), Path("sql/05_views.sql")],
+        after=["load"],
+        db=True,
+    ),
+    Stage(
+        "validate",
+        ["scripts/run_sql.py", "sql/03_validate.sql"],
+        code=[Path("scripts/run_sql.py"), Path("src/database.py"), Path("sql/03_validate.sql")],
+        after=["views"],
+        db=True,
+    ),
+]
+
+
+# ---------- GRAPH ----------
+def dependencies(stages: list[Stage]) -> dict[str, set[str]]:
+    """Explicit `after` edges plus producer -> consumer edges inferred from artifacts."""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    deps = {}
+    for s in stages:
+        deps[s.name] = set(s.after) | {producer[p] for p in s.inputs if p in producer}
+    return deps
+
+
+def topo_order(deps: dict[str, set[str]]) -> list[str]:
+    order, seen, visiting = [], set(), set()
+
+    def visit(name: str) -> None:
+        if name in seen:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle in pipeline at stage {name!r}")
+        visiting.add(name)
+        for d in sorted(deps[name]):
+            visit(d)
+        visiting.discard(name)
+        seen.add(name)
+        order.append(name)
+
+    for name in deps:
+        visit(name)
+    return order
+
+
+def closure(targets: list[str], deps: dict[str, set[str]]) -> set[str]:
+    """targets and everything they (transitively) depend on."""
+    out, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in out:
+            out.add(name)
+            todo.extend(deps[name])
+    return out
+
+
+# ---------- FINGERPRINTS ----------
+class Hasher:
+    """sha256 of files, memoised on (size, mtime) so unchanged large inputs are not re-read."""
+
+    def __init__(self, memo: dict) -> None:
+        self.memo = memo
+
+    def file(self, path: Path) -> str:
+        full = BASE_DIR / path
+        if not full.exists():
+            return "missing"
+        st = full.stat()
+        key = str(path)
+        cached = self.memo.get(key)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+        digest = hashlib.sha256()
+        with open(full, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.memo[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+
+def fingerprint(stage: Stage, hasher: Hasher, dep_fps: dict[str, str]) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps(stage.cmd).encode())
+    for p in sorted(stage.code) + sorted(stage.inputs):
+        h.update(f"{p}:{hasher.file(p)}\n".encode())
+    for name in sorted(dep_fps):
+        h.update(f"{name}:{dep_fps[name]}\n".encode())
+    return h.hexdigest()
+
+
+# ---------- RUN ----------
+@dataclass
+class Result:
+    status: str  # ran / cached / failed / blocked / would run
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float | None = None
+
+
+def launch(stage: Stage) -> tuple[subprocess.Popen, float]:
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log = open(LOG_DIR / f"{stage.name}.log", "w")
+    cmd = [sys.executable] + stage.cmd
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    return proc, time.perf_counter()
+
+
+def tail(path: Path, n: int = 15) -> str:
+    try:
+        return "\n".join(path.read_text(errors="replace").splitlines()[-n:])
+    except OSError:
+        return ""
+
+
+def run(stages: list[Stage], selected: set[str], forced: set[str], jobs: int, dry_run: bool) -> dict[str, Result]:
+    by_name = {s.name: s for s in stages}
+    deps = dependencies(stages)
+    order = [n for n in topo_order(deps) if n in selected]
+
+    state = json.loads(STATE_PATH.read_text()) if STATE_PATH.exists() else {"stages": {}, "hashes": {}}
+    hasher = Hasher(state["hashes"])
+    results: dict[str, Result] = {}
+    fps: dict[str, str] = {}
+    running: dict[int, tuple[str, subprocess.Popen, float]] = {}
+    pending = list(order)
+
+    def outputs_present(stage: Stage) -> bool:
+        return all((BASE_DIR / p).exists() for p in stage.outputs)
+
+    def save_state() -> None:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        STATE_PATH.write_text(json.dumps(state, indent=1))
+
+    while pending or running:
+        # start every stage whose dependencies are settled, up to `jobs` at a time
+        for name in list(pending):
+            if len(running) >= jobs:
+                break
+            stage = by_name[name]
+            dep_names = deps[name] & selected
+            if any(d not in results or results[d].status == "running" for d in dep_names):
+                continue
+            pending.remove(name)
+
+            if any(results[d].status in ("failed", "blocked") for d in dep_names):
+                results[name] = Result("blocked")
+                continue
+
+            # inputs are hashed only now, after upstream stages have written them
+            fp = fingerprint(stage, hasher, {d: fps.get(d, "") for d in dep_names})
+            fps[name] = fp
+            upstream_ran = any(results[d].status in ("ran", "would run") for d in dep_names)
+            cached = (
+                name not in forced
+                and not upstream_ran
+                and state["stages"].get(name, {}).get("fingerprint") == fp
+                and outputs_present(stage)
+            )
+            if cached:
+                results[name] = Result("cached")
+                continue
+            if dry_run:
+                results[name] = Result("would run")
+                continue
+
+            print(f"▶ {name}: {' '.join(stage.cmd)}", flush=True)
+            proc, started = launch(stage)
+            running[proc.pid] = (name, proc, started)
+            results[name] = Result("running")
+
+        if not running:
+            continue
+
+        pid, status, usage = os.wait4(-1, 0)
+        if pid not in running:
+            continue
+        name, proc, started = running.pop(pid)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stage = by_name[name]
+        res = Result(
+            "ran" if proc.returncode == 0 else "failed",
+            wall_s=time.perf_counter() - started,
+            cpu_s=usage.ru_utime + usage.ru_stime,
+            peak_rss_mb=usage.ru_maxrss / 1024,  # KiB on Linux
+        )
+        results[name] = res
+
+        if res.status == "ran":
+            # re-hash: outputs of this stage are inputs of the next ones
+            fps[name] = fingerprint(stage, hasher, {d: fps.get(d, "") for d in deps[name] & selected})
+            state["stages"][name] = {
+                "fingerprint": fps[name],
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "wall_s": round(res.wall_s, 2),
+                "peak_rss_mb": round(res.peak_rss_mb, 1),
+            }
+            save_state()
+            print(f"✅ {name} ({res.wall_s:.1f}s, peak {res.peak_rss_mb:.0f} MB)", flush=True)
+        else:
+            state["stages"].pop(name, None)
+            save_state()
+            print(f"❌ {name} exited with {proc.returncode}; log: {LOG_DIR / (name + '.log')}", flush=True)
+            print(tail(LOG_DIR / f"{name}.log"), flush=True)
+
+    if not dry_run:
+        save_state()
+    return {n: results[n] for n in order}
+
+
+def print_report(results: dict[str, Result], total_s: float) -> None:
+    print(f"\n{'stage':<20}{'status':<11}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}")
+    for name, r in results.items():
+        ran = r.status in ("ran", "failed")
+        wall = f"{r.wall_s:.1f}" if ran else "-"
+        cpu = f"{r.cpu_s:.1f}" if ran else "-"
+        peak = f"{r.peak_rss_mb:.0f}" if ran and r.peak_rss_mb is not None else "-"
+        print(f"{name:<20}{r.status:<11}{wall:>9}{cpu:>9}{peak:>10}")
+    print(f"total wall time: {total_s:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="stages run in parallel")
+    parser.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                        help="rerun these stages even if cached (no names = all)")
+    parser.add_argument("--no-db", action="store_true", help="skip stages that need Postgres")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--list", action="store_true", help="print the stages and their dependencies")
+    args = parser.parse_args()
+
+    stages = [s for s in STAGES if not (args.no_db and s.db)]
+    deps = dependencies(STAGES)
+    if args.no_db:
+        deps = {n: d & {s.name for s in stages} for n, d in deps.items() if n in {s.name for s in stages}}
+
+    if args.list:
+        for name in topo_order(deps):
+            print(f"{name:<20} <- {', '.join(sorted(deps[name])) or '-'}")
+        return
+
+    unknown = [t for t in args.targets + (args.force or []) if t not in deps]
+    if unknown:
+        parser.error(f"unknown stage(s): {unknown}; see --list")
+
+    selected = closure(args.targets or list(deps), deps)
+    forced = set(deps) if args.force == [] else set(args.force or [])
+
+    start = time.perf_counter()
+    results = run(stages, selected, forced, max(1, args.jobs), args.dry_run)
+    total = time.perf_counter() - start
+    print_report(results, total)
+
+    if not args.dry_run:
+        REPORT_PATH.write_text(json.dumps({
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_s": round(total, 2),
+            "stages": {n: vars(r) for n, r in results.items()},
+        }, indent=2))
+    if any(r.status in ("failed", "blocked") for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Run .sql files against the mart database, statement by statement, in one
+transaction. Result sets (e.g. from sql/03_validate.sql) are printed.
+
+Usage:
+    python scripts/run_sql.py sql/01_schema.sql sql/06_audit.sql
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.database import get_engine  # noqa: E402
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split on semicolons that end a line (the layout used in sql/); comment-only chunks are dropped."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        current.append(line)
+        code = line.split("--", 1)[0].rstrip()
+        if code.endswith(";"):
+            statements.append("\n".join(current))
+            current = []
+    statements.append("\n".join(current))
+
+    def has_code(stmt: str) -> bool:
+        return any(l.split("--", 1)[0].strip() for l in stmt.splitlines())
+
+    return [s.strip() for s in statements if has_code(s)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", type=Path, nargs="+")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    with engine.begin() as conn:
+        for path in args.files:
+            statements = split_statements(path.read_text())
+            for stmt in statements:
+                result = conn.exec_driver_sql(stmt)
+                if result.returns_rows:
+                    print(pd.DataFrame(result.fetchall(), columns=list(result.keys())).to_string(index=False))
+                    print()
+            print(f"✅ {path} ({len(statements)} statements)")
+
+
+if __name__ == "__main__":
+    main()
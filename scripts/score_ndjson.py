@@ -0,0 +1,105 @@
+"""
+Stream an NDJSON file of {"features": {...}} records through /predict/stream.
+
+The upload is sent with chunked transfer encoding from a background thread
+while results are read back on the main thread, so neither side ever holds
+the whole file in memory and large uploads cannot deadlock on full socket
+buffers.
+
+Usage:
+    python scripts/score_ndjson.py requests.jsonl -o scored.jsonl
+    cat requests.jsonl | python scripts/score_ndjson.py - > scored.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+# ---------- CONFIG ----------
+API_URL = "http://127.0.0.1:8000/predict/stream"
+CHUNK_SIZE = 1 << 20  # bytes per upload chunk
+
+
+def _send_chunks(conn: http.client.HTTPConnection, src, chunk_size: int, errors: list) -> None:
+    try:
+        while True:
+            data = src.read(chunk_size)
+            if not data:
+                break
+            conn.send(b"%X\r\n%b\r\n" % (len(data), data))
+        conn.send(b"0\r\n\r\n")
+    except Exception as e:  # surfaced by the reader thread
+        errors.append(e)
+
+
+def stream_score(src, dst, url: str = API_URL, chunk_size: int = CHUNK_SIZE, batch_size: int | None = None) -> dict:
+    """Upload ``src`` (binary file) and write scored NDJSON lines to ``dst`` (binary file)."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if batch_size is not None:
+        path += f"?batch_size={batch_size}"
+
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+    conn.putrequest("POST", path)
+    conn.putheader("Content-Type", "application/x-ndjson")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+
+    errors: list = []
+    writer = threading.Thread(target=_send_chunks, args=(conn, src, chunk_size, errors), daemon=True)
+    writer.start()
+
+    resp = conn.getresponse()
+    if resp.status != 200:
+        raise RuntimeError(f"API returned {resp.status}: {resp.read().decode(errors='replace')}")
+
+    n_ok = n_err = 0
+    for line in resp:
+        dst.write(line)
+        if b'"error"' in line:
+            n_err += 1
+        else:
+            n_ok += 1
+
+    writer.join()
+    conn.close()
+    if errors:
+        raise errors[0]
+    return {"scored": n_ok, "errors": n_err}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="NDJSON file to score, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="where to write scored NDJSON (default: stdout)")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--batch-size", type=int, default=None, help="records per server-side predict call")
+    args = parser.parse_args()
+
+    src = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    dst = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    start = time.perf_counter()
+    try:
+        stats = stream_score(src, dst, url=args.url, batch_size=args.batch_size)
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if dst is not sys.stdout.buffer:
+            dst.close()
+    elapsed = time.perf_counter() - start
+
+    total = stats["scored"] + stats["errors"]
+    print(
+        f"✅ scored {stats['scored']} records ({stats['errors']} errors) "
+        f"in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rec/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
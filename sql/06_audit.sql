@@ -0,0 +1,20 @@
+-- 06_audit.sql
+-- Scoring audit trail, bulk-inserted by the API's audit sink when AUDIT_DB_URL is set.
+-- Not dropped on re-run: it holds history.
+CREATE SCHEMA IF NOT EXISTS mart;
+
+CREATE TABLE IF NOT EXISTS mart.scoring_audit (
+  scored_at TIMESTAMPTZ NOT NULL,
+  endpoint VARCHAR(50) NOT NULL,
+  model_version VARCHAR(64) NOT NULL,
+
+  default_probability DOUBLE PRECISION NOT NULL,
+  risk_band VARCHAR(10) NOT NULL,
+  recommendation VARCHAR(10) NOT NULL,
+  missing_features TEXT,
+  features TEXT,
+
+  CONSTRAINT ck_scoring_audit_proba CHECK (default_probability >= 0 AND default_probability <= 1)
+);
+
+CREATE INDEX IF NOT EXISTS ix_scoring_audit_scored_at ON mart.scoring_audit (scored_at);
@@ -0,0 +1,541 @@
+"""
+Local, Postgres-free version of the mart views and the segment queries in
+sql/04_analytics.sql, computed over the processed parquet with pyarrow.
+
+Scans go through pyarrow datasets, so only the columns a query needs are
+read (projection) and labelled-only queries skip the unlabelled test file
+through a pushed-down `target IS NOT NULL` filter. Joins and group-bys run
+on Arrow's multi-threaded engine; CASE buckets are evaluated with np.select.
+
+Numbers follow the mart's storage rules so that results match the SQL:
+DECIMAL columns are rounded (half away from zero, as Postgres does), the
+ext_source mean is computed on those rounded values, and NULLs fall through
+CASE branches exactly as in SQL.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+PROCESSED_DIR = Path("data/processed")
+KEY = "sk_id_curr"
+
+# mart.fact_application / mart.dim_customer columns (see scripts/load_to_postgres.py)
+APPLICATION_COLS = [
+    "sk_id_curr", "target", "name_contract_type", "amt_income_total", "amt_credit", "amt_annuity",
+    "amt_goods_price", "days_birth", "days_employed", "flag_own_car", "flag_own_realty", "cnt_children",
+    "region_population_relative", "ext_source_1", "ext_source_2", "ext_source_3",
+]
+CUSTOMER_COLS = [
+    "code_gender", "name_education_type", "name_income_type", "occupation_type", "organization_type",
+    "name_family_status", "name_housing_type",
+]
+# DECIMAL(p, s) columns of sql/01_schema.sql -> s
+DECIMAL_SCALE = {
+    "region_population_relative": 6,
+    "ext_source_1": 3,
+    "ext_source_2": 3,
+    "ext_source_3": 3,
+    "prev_approved_rate": 4,
+    "inst_late_rate": 4,
+    "inst_payment_ratio_mean": 4,
+}
+INTEGER_COLS = {"days_birth", "days_employed", "cnt_children", "prev_days_decision_min"}
+
+BUREAU_COLS = ["bureau_credit_cnt", "bureau_active_cnt", "bureau_closed_cnt", "bureau_sum_debt",
+               "bureau_sum_overdue", "bureau_max_overdue"]
+INSTALLMENTS_COLS = ["inst_pay_cnt", "inst_late_cnt", "inst_late_rate", "inst_days_late_mean", "inst_days_late_max",
+                     "inst_amt_payment_sum", "inst_amt_instalment_sum", "inst_payment_ratio_mean"]
+# fact_previous_loans reserves these columns but the loader leaves them NULL;
+# the bureau / installments figures live in the staging tables
+PREVIOUS_RESERVED_COLS = BUREAU_COLS + ["bureau_credit_day_overdue_max"] + [
+    c for c in INSTALLMENTS_COLS if c != "inst_amt_instalment_sum"
+]
+
+
+# -------------------------
+# Scanning
+# -------------------------
+def scan(
+    path: Path,
+    columns: List[str],
+    labelled_only: bool = False,
+) -> pa.Table:
+    """
+    Read the given (lower-case) columns of one parquet file.
+
+    Column names are matched case-insensitively (the cleaned files keep the
+    raw upper-case names); columns the file lacks come back as NULL, and
+    dictionary (category) columns are decoded to plain strings. With
+    labelled_only, `target IS NOT NULL` is pushed down to the scan, so a file
+    without a target column is not read at all.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    actual = {name.lower(): name for name in dataset.schema.names}
+
+    if labelled_only:
+        if "target" not in actual:
+            return pa.table({c: pa.nulls(0) for c in columns})
+        table = dataset.to_table(
+            columns={c: ds.field(actual[c]) for c in columns if c in actual},
+            filter=ds.field(actual["target"]).is_valid(),
+        )
+    else:
+        table = dataset.to_table(columns={c: ds.field(actual[c]) for c in columns if c in actual})
+
+    out = {}
+    for c in columns:
+        if c not in actual:
+            out[c] = pa.nulls(table.num_rows)
+            continue
+        col = table.column(c)
+        if pa.types.is_dictionary(col.type):
+            col = pc.cast(col, col.type.value_type)
+        out[c] = col
+    return pa.table(out)
+
+
+def _round_half_away(col, ndigits: int):
+    return pc.round(pc.cast(col, pa.float64()), ndigits, round_mode="half_towards_infinity")
+
+
+def _as_stored(table: pa.Table) -> pa.Table:
+    """Apply the mart column types: DECIMAL rounding, INTEGER rounding."""
+    for name in table.column_names:
+        if name in DECIMAL_SCALE:
+            table = table.set_column(table.schema.get_field_index(name), name,
+                                     _round_half_away(table.column(name), DECIMAL_SCALE[name]))
+        elif name in INTEGER_COLS and pa.types.is_floating(table.column(name).type):
+            table = table.set_column(table.schema.get_field_index(name), name,
+                                     _round_half_away(table.column(name), 0))
+    return table
+
+
+def _yn_to_bool(col) -> pa.ChunkedArray:
+    s = pc.utf8_lower(pc.utf8_trim_whitespace(pc.cast(col, pa.string())))
+    return pc.if_else(pc.equal(s, "y"), True, pc.if_else(pc.equal(s, "n"), False, pa.scalar(None, pa.bool_())))
+
+
+# -------------------------
+# Mart tables
+# -------------------------
+def applications(
+    data_dir: Path = PROCESSED_DIR,
+    columns: List[str] | None = None,
+    labelled_only: bool = False,
+) -> pa.Table:
+    """
+    mart.fact_application joined with mart.dim_customer (both are built from the
+    same application rows, one per sk_id_curr), restricted to columns.
+    """
+    columns = columns or APPLICATION_COLS + CUSTOMER_COLS
+    parts = [
+        scan(Path(data_dir) / "application_train_clean.parquet", columns, labelled_only),
+        scan(Path(data_dir) / "application_test_clean.parquet", columns, labelled_only),
+    ]
+    table = pa.concat_tables(parts, promote_options="permissive")
+    for i, f in enumerate(table.schema):
+        if pa.types.is_null(f.type):  # absent from both files
+            table = table.set_column(i, f.name, pc.cast(table.column(i), pa.float64()))
+
+    if "target" in table.column_names:
+        target = pc.cast(table.column("target"), pa.int8())
+        table = table.set_column(table.schema.get_field_index("target"), "target", target)
+    for flag in ("flag_own_car", "flag_own_realty"):
+        if flag in table.column_names:
+            table = table.set_column(table.schema.get_field_index(flag), flag, _yn_to_bool(table.column(flag)))
+    return _as_stored(table)
+
+
+def previous_loans(data_dir: Path = PROCESSED_DIR) -> pa.Table:
+    """mart.fact_previous_loans: previous applications rolled up per applicant."""
+    prev = scan(Path(data_dir) / "previous_application_clean.parquet",
+                [KEY, "name_contract_status", "amt_credit", "amt_annuity", "days_decision"])
+    status = prev.column("name_contract_status")
+    prev = prev.append_column("is_approved", pc.cast(pc.fill_null(pc.equal(status, "Approved"), False), pa.int64()))
+    prev = prev.append_column("is_refused", pc.cast(pc.fill_null(pc.equal(status, "Refused"), False), pa.int64()))
+
+    agg = prev.group_by([KEY], use_threads=True).aggregate([
+        ([], "count_all"),
+        ("is_approved", "sum"),
+        ("is_refused", "sum"),
+        ("amt_credit", "mean"),
+        ("amt_credit", "max"),
+        ("amt_annuity", "mean"),
+        ("days_decision", "min"),
+    ])
+    out = pa.table({
+        KEY: agg.column(KEY),
+        "prev_app_cnt": agg.column("count_all"),
+        "prev_approved_cnt": agg.column("is_approved_sum"),
+        "prev_refused_cnt": agg.column("is_refused_sum"),
+        "prev_approved_rate": pc.divide(pc.cast(agg.column("is_approved_sum"), pa.float64()),
+                                        pc.cast(agg.column("count_all"), pa.float64())),
+        "prev_amt_credit_mean": agg.column("amt_credit_mean"),
+        "prev_amt_credit_max": pc.cast(agg.column("amt_credit_max"), pa.float64()),
+        "prev_amt_annuity_mean": agg.column("amt_annuity_mean"),
+        "prev_days_decision_min": pc.cast(agg.column("days_decision_min"), pa.float64()),
+    })
+    for c in PREVIOUS_RESERVED_COLS:
+        out = out.append_column(c, pa.nulls(out.num_rows, pa.float64()))
+    return _as_stored(out)
+
+
+def previous_loans_enriched(data_dir: Path = PROCESSED_DIR, previous: pa.Table | None = None) -> pa.Table:
+    """mart.fact_previous_loans_enriched: previous loans + bureau + installments staging tables."""
+    previous = previous_loans(data_dir) if previous is None else previous
+    fp = previous.select([KEY] + [c for c in previous.column_names if c.startswith("prev_")])
+    # stg_* columns are DOUBLE PRECISION (created from the parquet dtypes): no mart rounding
+    bureau = scan(Path(data_dir) / "bureau_agg.parquet", [KEY] + BUREAU_COLS)
+    inst = scan(Path(data_dir) / "installments_agg.parquet", [KEY] + INSTALLMENTS_COLS)
+    return (
+        fp.join(bureau, keys=KEY, join_type="left outer", use_threads=True)
+        .join(inst, keys=KEY, join_type="left outer", use_threads=True)
+    )
+
+
+def application_enriched(data_dir: Path = PROCESSED_DIR, previous: pa.Table | None = None) -> pa.Table:
+    """mart.v_application_enriched (sql/02_views.sql)."""
+    previous = previous_loans(data_dir) if previous is None else previous
+    app = applications(data_dir)
+    days = pc.cast(app.column("days_birth"), pa.float64())
+    app = app.append_column("age_years_calc", _round_half_away(pc.divide(pc.abs(days), 365.25), 1))
+    return app.join(previous, keys=KEY, join_type="left outer", use_threads=True)
+
+
+# -------------------------
+# Segment inputs
+# -------------------------
+def _np(table: pa.Table, col: str) -> np.ndarray:
+    """Numeric column as float64 numpy (NULL -> NaN)."""
+    return pc.cast(table.column(col), pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _labels(conditions: List[np.ndarray], labels: List[str | None], default: str | None) -> pa.Array:
+    """CASE WHEN ... THEN ... ELSE default END: first true condition wins, NaN compares false."""
+    codes = np.select(conditions, np.arange(len(labels)), default=len(labels))
+    choices = np.array(list(labels) + [default], dtype=object)
+    return pa.array(choices[codes], type=pa.string())
+
+
+def history_frame(data_dir: Path = PROCESSED_DIR, previous: pa.Table | None = None) -> pa.Table:
+    """
+    fact_application LEFT JOIN fact_previous_loans_enriched: the base of the
+    history / bureau / repayment segments in 04_analytics.sql.
+    """
+    previous = previous_loans(data_dir) if previous is None else previous
+    app = applications(data_dir, [KEY, "target"])
+    enriched = previous_loans_enriched(data_dir, previous).select(
+        [KEY, "prev_app_cnt", "prev_refused_cnt", "bureau_sum_debt", "bureau_max_overdue",
+         "bureau_credit_cnt", "inst_late_rate", "inst_days_late_mean"]
+    )
+    joined = app.join(enriched, keys=KEY, join_type="left outer", use_threads=True)
+    # AVG(CASE WHEN target THEN 1.0 ELSE 0.0 END): unlabelled rows count as 0
+    return joined.append_column("default_flag", pc.cast(pc.fill_null(joined.column("target"), 0), pa.float64()))
+
+
+def risk_profile_frame(data_dir: Path = PROCESSED_DIR, labelled_only: bool = False) -> pa.Table:
+    """mart.vw_customer_risk_profile (sql/05_views.sql), the columns the segments use."""
+    cols = [KEY, "target", "amt_income_total", "amt_credit", "amt_annuity", "days_birth", "cnt_children",
+            "ext_source_1", "ext_source_2", "ext_source_3", "name_income_type", "name_education_type",
+            "occupation_type"]
+    app = applications(data_dir, cols, labelled_only)
+
+    income, credit, annuity = _np(app, "amt_income_total"), _np(app, "amt_credit"), _np(app, "amt_annuity")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        loan_to_income = np.where(income > 0, credit / income, np.nan)
+        annuity_to_income = np.where(income > 0, annuity / income, np.nan)
+        age_years = _round_half_away(pa.array(np.abs(_np(app, "days_birth")) / 365.25, from_pandas=True), 1)
+        age_years = age_years.to_numpy(zero_copy_only=False)
+
+    # the view averages exact DECIMAL(4,3) values; compare in thousandths to stay exact
+    ext_milli = sum(np.round(_np(app, f"ext_source_{i}") * 1000) for i in (1, 2, 3))
+    ext_mean = ext_milli / 3000.0
+
+    risk_score = (
+        np.nan_to_num(1 - ext_mean, nan=0.0) * 0.6
+        + np.nan_to_num(annuity_to_income, nan=0.0) * 0.25
+        + np.nan_to_num(loan_to_income, nan=0.0) * 0.15
+    )
+
+    columns = {
+        KEY: app.column(KEY),
+        "target": app.column("target"),
+        "cnt_children": app.column("cnt_children"),
+        "name_income_type": app.column("name_income_type"),
+        "name_education_type": app.column("name_education_type"),
+        "occupation_type": app.column("occupation_type"),
+        "ext_source_mean": pa.array(ext_mean, from_pandas=True),
+        "age_band": _labels(
+            [np.isnan(age_years), age_years < 30, age_years < 45, age_years < 60],
+            [None, "under_30", "30_44", "45_59"], "60_plus"),
+        "lti_band": _labels(
+            [np.isnan(loan_to_income), loan_to_income >= 6, loan_to_income >= 4, loan_to_income >= 2],
+            [None, "very_high", "high", "medium"], "low"),
+        "dti_band": _labels(
+            [np.isnan(annuity_to_income), annuity_to_income >= 0.5, annuity_to_income >= 0.35,
+             annuity_to_income >= 0.2],
+            [None, "very_high", "high", "medium"], "low"),
+        "ext_band": _labels(
+            [np.isnan(ext_milli), ext_milli >= 2400, ext_milli >= 1800, ext_milli >= 1200],
+            [None, "best", "good", "medium"], "weak"),
+        "risk_score_simple": pa.array(risk_score),
+        "risk_tier": _labels([risk_score >= 1.0, risk_score >= 0.6], ["high", "medium"], "low"),
+    }
+    table = pa.table(columns)
+    not_high = pc.not_equal(table.column("risk_tier"), "high")
+    table = table.append_column(
+        "target_if_not_high", pc.if_else(not_high, table.column("target"), pa.scalar(None, pa.int8())))
+    return table.append_column("ext_missing", pc.cast(pc.is_null(table.column("ext_source_mean"),
+                                                                 nan_is_null=True), pa.int8()))
+
+
+# -------------------------
+# Segments (sql/04_analytics.sql, sql/02_views.sql)
+# -------------------------
+def _bucket_prev_refuse(t: pa.Table) -> pa.Array:
+    cnt, refused = _np(t, "prev_app_cnt"), _np(t, "prev_refused_cnt")
+    no_history = np.isnan(cnt) | (cnt == 0)
+    # refused / cnt compared exactly via integer cross-multiplication
+    return _labels(
+        [no_history, refused == 0, refused * 4 <= cnt, refused * 2 <= cnt, refused * 4 <= cnt * 3],
+        ["no_history", "0%", "(0, 25%]", "(25, 50%]", "(50, 75%]"], "(75, 100%]")
+
+
+def _bucket_debt(t: pa.Table) -> pa.Array:
+    x = _np(t, "bureau_sum_debt")
+    return _labels([np.isnan(x), x == 0, x < 50000, x < 200000, x < 500000],
+                   ["no_bureau_record", "0", "<50k", "50k-200k", "200k-500k"], "500k+")
+
+
+def _bucket_max_overdue(t: pa.Table) -> pa.Array:
+    x = _np(t, "bureau_max_overdue")
+    return _labels([np.isnan(x), x == 0, x < 1000, x < 5000, x < 20000],
+                   ["no_bureau_record", "0", "(0, 1k)", "[1k, 5k)", "[5k, 20k)"], "20k+")
+
+
+def _bucket_credit_cnt(t: pa.Table) -> pa.Array:
+    x = _np(t, "bureau_credit_cnt")
+    return _labels([np.isnan(x), x == 0, (x >= 1) & (x <= 2), (x >= 3) & (x <= 5), (x >= 6) & (x <= 10)],
+                   ["no_bureau_record", "0", "1-2", "3-5", "6-10"], "10+")
+
+
+def _bucket_late(t: pa.Table) -> pa.Array:
+    x = _np(t, "inst_late_rate")
+    return _labels([np.isnan(x), x == 0, x <= 0.1, x <= 0.3],
+                   ["no_history", "never_late", "rarely_late", "sometimes_late"], "often_late")
+
+
+def _bucket_delay(t: pa.Table) -> pa.Array:
+    x = _np(t, "inst_days_late_mean")
+    return _labels([np.isnan(x), x == 0, x <= 5, x <= 30],
+                   ["no_history", "on_time", "minor_delay", "moderate_delay"], "severe_delay")
+
+
+def _bucket_debt_level(t: pa.Table) -> pa.Array:
+    x = _np(t, "bureau_sum_debt")
+    return _labels([np.isnan(x), x < 50000, x < 200000], ["no_bureau", "low_debt", "mid_debt"], "high_debt")
+
+
+def _bucket_repayment(t: pa.Table) -> pa.Array:
+    return _labels([_np(t, "inst_late_rate") == 0], ["never_late"], "ever_late")
+
+
+def _bucket_children(t: pa.Table) -> pa.Array:
+    x = _np(t, "cnt_children")
+    return _labels([x == 0, x <= 2], ["no_children", "1_2_children"], "3plus_children")
+
+
+@dataclass
+class Segment:
+    """One GROUP BY query: bucket columns, aggregates and the SQL it mirrors."""
+    name: str  # output file stem
+    source: str  # "history" | "risk_profile" | "risk_profile_labelled" | "kpi"
+    keys: List[str]
+    measures: List[Tuple[str, str, str]]  # (output column, input column or "*", aggregate)
+    order: List[Tuple[str, str]] = field(default_factory=list)
+    buckets: Dict[str, Callable[[pa.Table], pa.Array]] = field(default_factory=dict)
+    min_count: int | None = None  # HAVING COUNT(*) > min_count
+    sql_marker: str | None = None  # unique text of its statement in sql/04_analytics.sql
+    sql: str | None = None  # explicit SQL when it is not in 04_analytics.sql
+
+
+_N = ("n_apps", "*", "count_all")
+_DEFAULT = ("default_rate", "default_flag", "mean")
+
+SEGMENTS: List[Segment] = [
+    Segment("prev_refuse_rate", "history", ["prev_refuse_rate_bucket"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"prev_refuse_rate_bucket": _bucket_prev_refuse},
+            sql_marker="AS prev_refuse_rate_bucket"),
+    Segment("bureau_debt", "history", ["debt_bucket"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"debt_bucket": _bucket_debt}, sql_marker="AS debt_bucket"),
+    Segment("bureau_max_overdue", "history", ["max_overdue_bucket"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"max_overdue_bucket": _bucket_max_overdue},
+            sql_marker="AS max_overdue_bucket"),
+    Segment("bureau_credit_cnt", "history", ["credit_cnt_bucket"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"credit_cnt_bucket": _bucket_credit_cnt},
+            sql_marker="AS credit_cnt_bucket"),
+    Segment("repayment_punctuality", "history", ["late_behavior"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"late_behavior": _bucket_late}, sql_marker="AS late_behavior"),
+    Segment("payment_delay", "history", ["delay_severity"], [_N, _DEFAULT],
+            [("n_apps", "descending")], {"delay_severity": _bucket_delay}, sql_marker="AS delay_severity"),
+    Segment("debt_x_repayment", "history", ["debt_level", "repayment_behavior"], [_N, _DEFAULT],
+            [("default_rate", "descending")],
+            {"debt_level": _bucket_debt_level, "repayment_behavior": _bucket_repayment},
+            sql_marker="AS repayment_behavior"),
+    Segment("risk_tier", "risk_profile_labelled", ["risk_tier"],
+            [("customers", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("risk_tier", "ascending")], sql_marker="GROUP BY risk_tier ORDER BY risk_tier"),
+    Segment("lti_band", "risk_profile_labelled", ["lti_band"],
+            [("cnt", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("lti_band", "ascending")], sql_marker="GROUP BY lti_band"),
+    Segment("ext_band", "risk_profile_labelled", ["ext_band"],
+            [("cnt", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("ext_band", "ascending")], sql_marker="GROUP BY ext_band"),
+    Segment("risk_tier_x_age_band", "risk_profile", ["risk_tier", "age_band"],
+            [("customers", "*", "count_all")],
+            [("risk_tier", "ascending"), ("age_band", "ascending")], sql_marker="GROUP BY risk_tier, age_band"),
+    Segment("policy_impact", "risk_profile_labelled", [],
+            [("total_apps", "*", "count_all"), ("current_default_rate", "target", "mean"),
+             ("default_rate_after_policy", "target_if_not_high", "mean")],
+            sql_marker="AS default_rate_after_policy"),
+    Segment("ext_missing_rate", "risk_profile", [], [("ext_missing_rate", "ext_missing", "mean")],
+            sql_marker="AS ext_missing_rate"),
+    Segment("income_type", "risk_profile_labelled", ["name_income_type"],
+            [("customers", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("default_rate", "descending")], sql_marker="GROUP BY name_income_type"),
+    Segment("education_type", "risk_profile_labelled", ["name_education_type"],
+            [("customers", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("default_rate", "descending")], sql_marker="GROUP BY name_education_type"),
+    Segment("children_band", "risk_profile_labelled", ["children_band"],
+            [("customers", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("children_band", "ascending")], {"children_band": _bucket_children}, sql_marker="AS children_band"),
+    Segment("occupation_type", "risk_profile_labelled", ["occupation_type"],
+            [("customers", "*", "count_all"), ("default_rate", "target", "mean")],
+            [("default_rate", "descending")], min_count=1000, sql_marker="GROUP BY occupation_type"),
+    Segment("kpi_segment", "kpi", ["name_contract_type", "name_education_type"],
+            [("applications", "*", "count_all"), ("default_rate", "target", "mean"),
+             ("avg_amt_credit", "amt_credit", "mean")],
+            [("name_contract_type", "ascending"), ("name_education_type", "ascending")],
+            sql="SELECT * FROM mart.v_kpi_segment"),
+]
+
+
+def run_segment(segment: Segment, table: pa.Table) -> pd.DataFrame:
+    """Bucket, group and aggregate one segment over its source table."""
+    for key, fn in segment.buckets.items():
+        table = table.append_column(key, fn(table))
+
+    aggs = [([], "count_all") if col == "*" else (col, agg) for _, col, agg in segment.measures]
+    result = table.group_by(segment.keys, use_threads=True).aggregate(aggs)
+    names = {("count_all" if col == "*" else f"{col}_{agg}"): out for out, col, agg in segment.measures}
+    result = result.rename_columns([names.get(c, c) for c in result.column_names])
+    result = result.select(segment.keys + [out for out, _, _ in segment.measures])
+
+    if segment.min_count is not None:
+        count_col = next(out for out, col, _ in segment.measures if col == "*")
+        result = result.filter(pc.greater(result.column(count_col), segment.min_count))
+    if segment.order:
+        # row order only matters for ties-free display; parity checks compare by key
+        result = result.sort_by(segment.order, null_placement="at_end")
+    return result.to_pandas()
+
+
+def run_segments(data_dir: Path = PROCESSED_DIR, segments: List[Segment] | None = None) -> Dict[str, pd.DataFrame]:
+    """Every segment, sharing the scanned / joined source tables between them."""
+    segments = SEGMENTS if segments is None else segments
+    sources: Dict[str, pa.Table] = {}
+
+    def source(name: str) -> pa.Table:
+        if name not in sources:
+            if name == "history":
+                sources[name] = history_frame(data_dir)
+            elif name == "risk_profile":
+                sources[name] = risk_profile_frame(data_dir)
+            elif name == "risk_profile_labelled":
+                sources[name] = risk_profile_frame(data_dir, labelled_only=True)
+            else:
+                sources[name] = applications(data_dir, [KEY, "target", "amt_credit", "name_contract_type",
+                                                        "name_education_type"])
+        return sources[name]
+
+    return {s.name: run_segment(s, source(s.source)) for s in segments}
+
+
+# -------------------------
+# Dashboard extract (notebooks/06_dashboard_data_prep.ipynb)
+# -------------------------
+EDUCATION_GROUPS = {
+    "Lower secondary": "Low",
+    "Secondary / secondary special": "Medium",
+    "Incomplete higher": "Medium",
+    "Higher education": "High",
+    "Academic degree": "High",
+}
+FAMILY_GROUPS = {
+    "Married": "Married",
+    "Civil marriage": "Married",
+    "Single / not married": "Single",
+    "Separated": "Single",
+}
+
+
+def customer_profile_eda(data_dir: Path = PROCESSED_DIR) -> pd.DataFrame:
+    """dashboard/customer_profile_eda.csv: training applicants with the notebook's derived groups."""
+    cols = ["sk_id_curr", "target", "amt_income_total", "amt_credit", "name_education_type", "name_family_status",
+            "cnt_children", "age_years", "days_employed", "flag_own_car"]
+    df = scan(Path(data_dir) / "application_train_clean.parquet", cols).to_pandas()
+    days = df["days_employed"]
+    df["employment_years"] = (-days / 365).where(days < 0)
+    df["employment_status"] = np.where(days == 365243, "Not employed", "Employed")
+    df["education_group"] = df["name_education_type"].map(EDUCATION_GROUPS).fillna("Other")
+    df["family_group"] = df["name_family_status"].map(FAMILY_GROUPS).fillna("Other")
+    return df
+
+
+# -------------------------
+# Parity with the SQL results
+# -------------------------
+def segment_sql(segment: Segment, statements: List[str]) -> str:
+    """The statement (out of the split sql/04_analytics.sql) that a segment mirrors."""
+    if segment.sql:
+        return segment.sql
+    matches = [s for s in statements if segment.sql_marker in " ".join(s.split())]
+    if len(matches) != 1:
+        raise ValueError(f"{segment.name}: expected one statement containing {segment.sql_marker!r}, "
+                         f"found {len(matches)}")
+    return matches[0]
+
+
+def compare_segment(local: pd.DataFrame, sql: pd.DataFrame, keys: List[str], rtol: float = 1e-9) -> List[str]:
+    """Differences between a local and a SQL segment table (empty list = parity)."""
+    if list(local.columns) != list(sql.columns):
+        return [f"columns differ: {list(local.columns)} vs {list(sql.columns)}"]
+    if len(local) != len(sql):
+        return [f"row count differs: {len(local)} vs {len(sql)}"]
+
+    def keyed(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        for k in keys:
+            df[k] = df[k].astype(object).where(df[k].notna(), "<NULL>").astype(str)
+        return df.sort_values(keys).reset_index(drop=True) if keys else df
+
+    a, b = keyed(local), keyed(sql)
+    problems = []
+    for col in a.columns:
+        if col in keys:
+            if not (a[col] == b[col]).all():
+                problems.append(f"{col}: keys differ")
+            continue
+        x = pd.to_numeric(a[col], errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(b[col], errors="coerce").to_numpy(dtype=float)
+        if not np.allclose(x, y, rtol=rtol, atol=1e-12, equal_nan=True):
+            problems.append(f"{col}: max abs diff {np.nanmax(np.abs(x - y)):.3g}")
+    return problems
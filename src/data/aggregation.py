@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+KEY = "sk_id_curr"
+
+INSTALLMENTS_COLS = [
+    "sk_id_curr",
+    "sk_id_prev",
+    "amt_instalment",
+    "amt_payment",
+    "days_instalment",
+    "days_entry_payment",
+]
+
+BUREAU_COLS = [
+    "sk_id_curr",
+    "sk_id_bureau",
+    "credit_active",
+    "amt_credit_sum_debt",
+    "amt_credit_sum_overdue",
+    "amt_credit_max_overdue",
+]
+
+# How each state column merges across two states of the same applicant.
+# Sums and counts add; maxes take the larger non-missing value.
+INSTALLMENTS_STATE_SPEC: Dict[str, str] = {
+    "rows": "sum",
+    "prev_cnt": "sum",
+    "late_cnt": "sum",
+    "late_pos_sum": "sum",
+    "late_pos_cnt": "sum",
+    "late_pos_max": "max",
+    "pay_sum": "sum",
+    "inst_sum": "sum",
+    "ratio_sum": "sum",
+    "ratio_cnt": "sum",
+}
+
+# parquet metadata key of the state file holding its manifest (base run + applied deltas)
+MANIFEST_KEY = b"aggregation_manifest"
+
+BUREAU_STATE_SPEC: Dict[str, str] = {
+    "credit_cnt": "sum",
+    "active_cnt": "sum",
+    "closed_cnt": "sum",
+    "debt_sum": "sum",
+    "overdue_sum": "sum",
+    "max_overdue": "max",
+}
+
+
+# -------------------------
+# Installments
+# -------------------------
+def prepare_installments(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Select installment columns and add late_days / late_flag / payment_ratio.
+    """
+    inst = raw.copy()
+    inst.columns = inst.columns.str.lower()
+    inst = inst[INSTALLMENTS_COLS]
+
+    inst["late_days"] = inst["days_entry_payment"] - inst["days_instalment"]
+    inst["late_flag"] = (inst["late_days"] > 0).astype("int")
+    inst["payment_ratio"] = inst["amt_payment"] / inst["amt_instalment"].replace(0, np.nan)
+    return inst
+
+
+def aggregate_installments(inst: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference full aggregation of prepared installments to applicant grain.
+    Used to verify the state-based path (see installments_state).
+    """
+    agg = (
+        inst.groupby(KEY)
+        .agg(
+            inst_pay_cnt=("sk_id_prev", "count"),
+            inst_late_cnt=("late_flag", "sum"),
+            inst_late_rate=("late_flag", "mean"),
+            inst_days_late_mean=("late_days", lambda x: x[x > 0].mean()),
+            inst_days_late_max=("late_days", lambda x: x[x > 0].max()),
+            inst_amt_payment_sum=("amt_payment", "sum"),
+            inst_amt_instalment_sum=("amt_instalment", "sum"),
+            inst_payment_ratio_mean=("payment_ratio", "mean"),
+        )
+        .reset_index()
+    )
+
+    agg["inst_days_late_mean"] = agg["inst_days_late_mean"].fillna(0)
+    agg["inst_days_late_max"] = agg["inst_days_late_max"].fillna(0)
+    agg["inst_payment_ratio_mean"] = agg["inst_payment_ratio_mean"].fillna(0)
+    return agg
+
+
+def installments_state(inst: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mergeable per-applicant state of prepared installment rows.
+
+    Parameters
+    ----------
+    inst : pd.DataFrame
+        Output of prepare_installments (full history or a delta).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per sk_id_curr with the columns of INSTALLMENTS_STATE_SPEC.
+    """
+    late_pos = inst["late_days"].where(inst["late_days"] > 0)
+    frame = pd.DataFrame({
+        KEY: inst[KEY],
+        "sk_id_prev": inst["sk_id_prev"],
+        "late_flag": inst["late_flag"],
+        "late_pos": late_pos,
+        "amt_payment": inst["amt_payment"],
+        "amt_instalment": inst["amt_instalment"],
+        "payment_ratio": inst["payment_ratio"],
+    })
+    return (
+        frame.groupby(KEY)
+        .agg(
+            rows=("late_flag", "size"),
+            prev_cnt=("sk_id_prev", "count"),
+            late_cnt=("late_flag", "sum"),
+            late_pos_sum=("late_pos", "sum"),
+            late_pos_cnt=("late_pos", "count"),
+            late_pos_max=("late_pos", "max"),
+            pay_sum=("amt_payment", "sum"),
+            inst_sum=("amt_instalment", "sum"),
+            ratio_sum=("payment_ratio", "sum"),
+            ratio_cnt=("payment_ratio", "count"),
+        )
+        .reset_index()
+    )
+
+
+def finalize_installments(state: pd.DataFrame) -> pd.DataFrame:
+    """Turn installments state into the columns of aggregate_installments."""
+    late_pos_cnt = state["late_pos_cnt"].replace(0, np.nan)
+    ratio_cnt = state["ratio_cnt"].replace(0, np.nan)
+    return pd.DataFrame({
+        KEY: state[KEY],
+        "inst_pay_cnt": state["prev_cnt"].astype("int64"),
+        "inst_late_cnt": state["late_cnt"].astype("int64"),
+        "inst_late_rate": state["late_cnt"] / state["rows"],
+        "inst_days_late_mean": (state["late_pos_sum"] / late_pos_cnt).fillna(0),
+        "inst_days_late_max": state["late_pos_max"].fillna(0),
+        "inst_amt_payment_sum": state["pay_sum"],
+        "inst_amt_instalment_sum": state["inst_sum"],
+        "inst_payment_ratio_mean": (state["ratio_sum"] / ratio_cnt).fillna(0),
+    }).reset_index(drop=True)
+
+
+# -------------------------
+# Bureau
+# -------------------------
+def prepare_bureau(raw: pd.DataFrame) -> pd.DataFrame:
+    bureau = raw.copy()
+    bureau.columns = bureau.columns.str.lower()
+    return bureau[BUREAU_COLS]
+
+
+def aggregate_bureau(bureau: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reference full aggregation of bureau records to applicant grain.
+    Used to verify the state-based path (see bureau_state).
+    """
+    bureau_agg = (
+        bureau
+        .groupby(KEY)
+        .agg(
+            bureau_credit_cnt=("sk_id_bureau", "count"),
+            bureau_active_cnt=("credit_active", lambda x: (x == "Active").sum()),
+            bureau_closed_cnt=("credit_active", lambda x: (x == "Closed").sum()),
+            bureau_sum_debt=("amt_credit_sum_debt", "sum"),
+            bureau_sum_overdue=("amt_credit_sum_overdue", "sum"),
+            bureau_max_overdue=("amt_credit_max_overdue", "max"),
+        )
+        .reset_index()
+    )
+
+    # replace NaN with 0 for sums
+    num_cols = [
+        "bureau_sum_debt",
+        "bureau_sum_overdue",
+        "bureau_max_overdue",
+    ]
+    bureau_agg[num_cols] = bureau_agg[num_cols].fillna(0)
+    return bureau_agg
+
+
+def bureau_state(bureau: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mergeable per-applicant state of bureau records.
+
+    Parameters
+    ----------
+    bureau : pd.DataFrame
+        Output of prepare_bureau (full history or a delta).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per sk_id_curr with the columns of BUREAU_STATE_SPEC.
+    """
+    frame = pd.DataFrame({
+        KEY: bureau[KEY],
+        "sk_id_bureau": bureau["sk_id_bureau"],
+        "is_active": (bureau["credit_active"] == "Active").astype("int64"),
+        "is_closed": (bureau["credit_active"] == "Closed").astype("int64"),
+        "debt": bureau["amt_credit_sum_debt"],
+        "overdue": bureau["amt_credit_sum_overdue"],
+        "max_overdue": bureau["amt_credit_max_overdue"],
+    })
+    return (
+        frame.groupby(KEY)
+        .agg(
+            credit_cnt=("sk_id_bureau", "count"),
+            active_cnt=("is_active", "sum"),
+            closed_cnt=("is_closed", "sum"),
+            debt_sum=("debt", "sum"),
+            overdue_sum=("overdue", "sum"),
+            max_overdue=("max_overdue", "max"),
+        )
+        .reset_index()
+    )
+
+
+def finalize_bureau(state: pd.DataFrame) -> pd.DataFrame:
+    """Turn bureau state into the columns of aggregate_bureau."""
+    return pd.DataFrame({
+        KEY: state[KEY],
+        "bureau_credit_cnt": state["credit_cnt"].astype("int64"),
+        "bureau_active_cnt": state["active_cnt"].astype("int64"),
+        "bureau_closed_cnt": state["closed_cnt"].astype("int64"),
+        "bureau_sum_debt": state["debt_sum"].fillna(0),
+        "bureau_sum_overdue": state["overdue_sum"].fillna(0),
+        "bureau_max_overdue": state["max_overdue"].fillna(0),
+    }).reset_index(drop=True)
+
+
+# -------------------------
+# Delta folding
+# -------------------------
+def merge_states(states: Iterable[pd.DataFrame], spec: Dict[str, str]) -> pd.DataFrame:
+    """
+    Merge partial states of the same applicants (e.g. history + delta).
+    Sums add up; maxes skip missing values, so NaN only survives when every
+    part is NaN.
+    """
+    return pd.concat(states, ignore_index=True).groupby(KEY).agg(spec).reset_index()
+
+
+def fold_delta(
+    state: pd.DataFrame,
+    delta_state: pd.DataFrame,
+    spec: Dict[str, str],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fold a delta state into the persisted state.
+
+    Returns
+    -------
+    (pd.DataFrame, pd.DataFrame)
+        The new full state (sorted by sk_id_curr) and the merged state of the
+        applicants touched by the delta only.
+    """
+    touched = state[KEY].isin(delta_state[KEY])
+    merged = merge_states([state[touched], delta_state], spec)
+    new_state = (
+        pd.concat([state[~touched], merged], ignore_index=True)
+        .sort_values(KEY, kind="stable")
+        .reset_index(drop=True)
+    )
+    return new_state, merged
+
+
+def replace_rows(out: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """Replace (or add) the applicants in rows within an aggregate table, sorted by sk_id_curr."""
+    kept = out[~out[KEY].isin(rows[KEY])]
+    return (
+        pd.concat([kept, rows[out.columns]], ignore_index=True)
+        .sort_values(KEY, kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def compare_aggregates(result: pd.DataFrame, expected: pd.DataFrame, rtol: float = 1e-9) -> Dict[str, float]:
+    """
+    Max absolute difference per column between two aggregate tables keyed by sk_id_curr.
+    Columns outside rtol (or differing key sets) are returned as mismatches; an empty
+    dict means the tables match.
+    """
+    a = result.set_index(KEY).sort_index()
+    b = expected.set_index(KEY).sort_index()
+    if not a.index.equals(b.index):
+        return {"applicants_not_in_both": float(len(a.index.symmetric_difference(b.index)))}
+
+    mismatches = {}
+    for col in b.columns:
+        x = a[col].to_numpy(dtype=float)
+        y = b[col].to_numpy(dtype=float)
+        if not np.allclose(x, y, rtol=rtol, atol=0, equal_nan=True):
+            mismatches[col] = float(np.nanmax(np.abs(x - y)))
+    return mismatches
+
+
+# -------------------------
+# I/O helpers for the aggregation scripts
+# -------------------------
+def read_raw(path) -> pd.DataFrame:
+    """Raw rows from a CSV (as shipped) or parquet delta file."""
+    path = str(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def file_digest(path) -> str:
+    """sha256 of a delta file, so the same delta is never folded in twice."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_parquet_atomic(df: pd.DataFrame, path, metadata: Dict[bytes, bytes] | None = None) -> None:
+    """
+    Write df to path through a temporary file and os.replace, so readers (and
+    a rerun after a crash) see either the old file or the new one, never a
+    partial write. metadata is added to the file's schema metadata.
+    """
+    path = Path(path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def write_state(state: pd.DataFrame, manifest: Dict[str, Any], path) -> None:
+    """
+    Persist the state together with its manifest in one parquet file, so the
+    single rename in write_parquet_atomic commits both: a state that already
+    includes a delta can never be paired with a manifest that does not list it.
+    """
+    write_parquet_atomic(state, path, {MANIFEST_KEY: json.dumps(manifest).encode()})
+    # manifest of states written before it moved into the parquet metadata
+    Path(path).with_suffix(".json").unlink(missing_ok=True)
+
+
+def read_state(path) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """The state and its manifest, as written by write_state."""
+    table = pq.read_table(path)
+    raw = (table.schema.metadata or {}).get(MANIFEST_KEY)
+    if raw is None:
+        manifest = json.loads(Path(path).with_suffix(".json").read_text())
+    else:
+        manifest = json.loads(raw)
+    return table.to_pandas(), manifest
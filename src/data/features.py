@@ -0,0 +1,205 @@
+"""
+Model feature matrix: the joins and transformations of notebook 04, plus an
+on-disk cache of the result keyed by a hash of its inputs.
+
+The cached matrix is a plain float64 .npy file (categoricals stored as codes,
+NaN for missing) next to the target and a small JSON of column names and
+category labels. np.load(..., mmap_mode="r") maps it instead of reading it,
+so any number of worker processes can share one copy through the page cache;
+matrix_frame turns (a slice of) it back into the DataFrame the sklearn
+pipeline expects.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY = "sk_id_curr"
+TARGET_COL = "target"
+EMPLOYED_PLACEHOLDER = 365243
+
+NUMERIC_FEATURES = [
+    # affordability
+    "amt_income_total_log",
+    "amt_credit_log",
+    "amt_annuity_log",
+    "debt_to_income",
+    # employment
+    "is_currently_employed",
+    "years_employed",
+    # external risk
+    "ext_source_1",
+    "ext_source_2",
+    "ext_source_3",
+    # bureau
+    "bureau_sum_debt_log",
+    "bureau_active_cnt",
+    "bureau_sum_overdue",
+]
+CATEGORICAL_FEATURES = [
+    "name_contract_type",
+    "name_income_type",
+    "name_education_type",
+    "name_family_status",
+    "name_housing_type",
+]
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+APPLICATION_COLS = [
+    KEY, TARGET_COL, "amt_income_total", "amt_credit", "amt_annuity", "days_employed",
+    "ext_source_1", "ext_source_2", "ext_source_3",
+] + CATEGORICAL_FEATURES
+BUREAU_COLS = [KEY, "bureau_sum_debt", "bureau_active_cnt", "bureau_sum_overdue"]
+
+# bump when the cache layout changes; part of the cache key
+MATRIX_FORMAT = 1
+
+
+# -------------------------
+# Features
+# -------------------------
+def read_inputs(app_path: Path, bureau_path: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read only the columns build_features needs (the cleaned files keep upper-case names)."""
+    app = pd.read_parquet(app_path, columns=[c.upper() for c in APPLICATION_COLS])
+    bureau = pd.read_parquet(bureau_path, columns=BUREAU_COLS)
+    app.columns = app.columns.str.lower()
+    return app, bureau
+
+
+def build_features(app: pd.DataFrame, bureau: pd.DataFrame) -> pd.DataFrame:
+    """
+    Labelled training rows with TARGET_COL and FEATURES, as in notebook 04.
+
+    Parameters
+    ----------
+    app : pd.DataFrame
+        Cleaned application rows (lower-case columns of APPLICATION_COLS).
+    bureau : pd.DataFrame
+        bureau_agg rows, one per sk_id_curr.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per labelled application; categoricals as category dtype.
+    """
+    df = app[app[TARGET_COL].notna()].merge(bureau, on=KEY, how="left")
+
+    df["is_currently_employed"] = (df["days_employed"] < EMPLOYED_PLACEHOLDER).astype(int)
+    days_employed_clean = df["days_employed"].replace(EMPLOYED_PLACEHOLDER, np.nan)
+    df["years_employed"] = days_employed_clean.abs() / 365
+
+    df["debt_to_income"] = df["amt_annuity"] / df["amt_income_total"]
+    df.loc[df["amt_income_total"] <= 0, "debt_to_income"] = np.nan
+
+    for col in ["amt_income_total", "amt_credit", "amt_annuity"]:
+        df[f"{col}_log"] = np.log1p(df[col])
+    df["bureau_sum_debt_log"] = np.log1p(df["bureau_sum_debt"].clip(lower=0))
+
+    out = df[[TARGET_COL] + FEATURES].copy()
+    out[TARGET_COL] = out[TARGET_COL].astype("int8")
+    for col in CATEGORICAL_FEATURES:
+        out[col] = out[col].astype("category")
+    return out.reset_index(drop=True)
+
+
+# -------------------------
+# Matrix cache
+# -------------------------
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def matrix_key(inputs: Iterable[Path]) -> str:
+    """Hash of the input files, this module's code and the cache format."""
+    h = hashlib.sha256(f"format:{MATRIX_FORMAT}\n".encode())
+    h.update(f"code:{file_sha256(Path(__file__))}\n".encode())
+    for path in inputs:
+        h.update(f"{Path(path).name}:{file_sha256(Path(path))}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def write_matrix(df: pd.DataFrame, out_dir: Path) -> None:
+    """
+    Store df (output of build_features) as X.npy / y.npy / meta.json.
+
+    The directory is written under a temporary name and renamed into place,
+    so a crashed build never leaves a half-written cache entry behind.
+    """
+    X = np.empty((len(df), len(FEATURES)), dtype=np.float64)
+    categories = {}
+    for j, col in enumerate(FEATURES):
+        if col in CATEGORICAL_FEATURES:
+            codes = df[col].cat.codes.to_numpy()
+            X[:, j] = np.where(codes < 0, np.nan, codes)
+            categories[col] = [str(c) for c in df[col].cat.categories]
+        else:
+            X[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    tmp = out_dir.with_name(f"{out_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "X.npy", X)
+    np.save(tmp / "y.npy", df[TARGET_COL].to_numpy(dtype=np.int8))
+    (tmp / "meta.json").write_text(json.dumps({
+        "format": MATRIX_FORMAT,
+        "rows": len(df),
+        "columns": FEATURES,
+        "categorical": categories,
+    }, indent=2))
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    tmp.rename(out_dir)
+
+
+def load_matrix(cache_dir: Path, mmap: bool = True) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """X (memory-mapped, read-only by default), y and the meta of one cache entry."""
+    mode = "r" if mmap else None
+    X = np.load(cache_dir / "X.npy", mmap_mode=mode)
+    y = np.load(cache_dir / "y.npy", mmap_mode=mode)
+    meta = json.loads((cache_dir / "meta.json").read_text())
+    return X, y, meta
+
+
+def matrix_frame(X: np.ndarray, meta: Dict, rows: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    DataFrame view of (rows of) a cached matrix with the original column
+    types: floats for numerics, object strings (NaN for missing) for
+    categoricals, i.e. what the API sends to the pipeline.
+    """
+    block = X if rows is None else X[rows]
+    data = {}
+    for j, col in enumerate(meta["columns"]):
+        values = np.asarray(block[:, j])
+        labels = meta["categorical"].get(col)
+        if labels is None:
+            data[col] = values
+            continue
+        missing = np.isnan(values)
+        decoded = np.asarray(labels, dtype=object)[np.where(missing, 0, values).astype(np.intp)]
+        decoded[missing] = np.nan
+        data[col] = decoded
+    return pd.DataFrame(data)
+
+
+def build_or_load_matrix(app_path: Path, bureau_path: Path, cache_root: Path) -> Tuple[Path, bool]:
+    """
+    Cache directory holding the feature matrix for these inputs, building
+    it first when it is not there yet. Returns (directory, cache_hit).
+    """
+    cache_dir = cache_root / matrix_key([app_path, bureau_path])
+    if (cache_dir / "meta.json").exists():
+        return cache_dir, True
+    app, bureau = read_inputs(app_path, bureau_path)
+    write_matrix(build_features(app, bureau), cache_dir)
+    return cache_dir, False
@@ -0,0 +1,500 @@
+"""
+Pre-load validation of mart tables against the constraints declared in sql/.
+
+The rules are read from the CREATE TABLE statements themselves (column types,
+NOT NULL, PRIMARY KEY / UNIQUE, CHECK expressions), so the schema stays the
+single source of truth. Values are first coerced the way Postgres would
+store them (integers rounded, DECIMAL(p,s) rounded to s digits), then each
+CHECK is evaluated over whole columns with SQL three-valued logic: pandas'
+nullable "boolean" dtype implements the same Kleene AND / OR / NOT, and a row
+only violates a CHECK when the expression is FALSE (NULL passes, as in SQL).
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SCHEMA_PATH = BASE_DIR / "sql" / "01_schema.sql"
+QUARANTINE_DIR = BASE_DIR / "data" / "quarantine"
+
+VIOLATIONS_COL = "_violations"
+
+INTEGER_RANGES = {
+    "SMALLINT": (-(2 ** 15), 2 ** 15 - 1),
+    "INTEGER": (-(2 ** 31), 2 ** 31 - 1),
+    "INT": (-(2 ** 31), 2 ** 31 - 1),
+    "BIGINT": (-(2 ** 63), 2 ** 63 - 1),
+}
+FLOAT_TYPES = {"DOUBLE PRECISION", "REAL", "FLOAT"}
+TRUE_STRINGS = {"t", "true", "y", "yes", "on", "1"}
+FALSE_STRINGS = {"f", "false", "n", "no", "off", "0"}
+
+
+@dataclass
+class ColumnRule:
+    name: str
+    sql_type: str  # e.g. "INTEGER", "DECIMAL", "VARCHAR", "DOUBLE PRECISION"
+    length: int | None = None  # VARCHAR(n) / DECIMAL precision
+    scale: int | None = None  # DECIMAL scale
+    not_null: bool = False
+
+
+@dataclass
+class CheckRule:
+    name: str
+    expression: str
+    evaluate: Callable[[pd.DataFrame], pd.Series]
+
+
+@dataclass
+class TableRules:
+    name: str  # schema-qualified, e.g. "mart.fact_application"
+    columns: Dict[str, ColumnRule] = field(default_factory=dict)
+    checks: List[CheckRule] = field(default_factory=list)
+    keys: Dict[str, List[str]] = field(default_factory=dict)  # PRIMARY KEY / UNIQUE name -> columns
+
+
+# -------------------------
+# CHECK expressions
+# -------------------------
+_TOKEN = re.compile(r"\s*(>=|<=|<>|!=|=|<|>|\(|\)|,|'(?:[^']|'')*'|-?\d+(?:\.\d+)?|[A-Za-z_][A-Za-z0-9_]*)")
+
+
+def _tokenize(expr: str) -> List[str]:
+    tokens, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise ValueError(f"Unsupported CHECK syntax near: {expr[pos:pos + 20]!r}")
+        tokens.append(m.group(1))
+        pos = m.end()
+    return tokens
+
+
+class _CheckParser:
+    """
+    Recursive descent over the CHECK subset used in sql/: AND / OR / NOT,
+    parentheses, comparisons, IS [NOT] NULL, [NOT] IN (...), BETWEEN.
+    Compiles to a function of the (coerced) frame returning a "boolean" Series.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def parse(self):
+        fn = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.pos]!r} in CHECK")
+        return fn
+
+    # --- token helpers ---
+    def _peek(self, offset: int = 0) -> str | None:
+        i = self.pos + offset
+        return self.tokens[i].upper() if i < len(self.tokens) else None
+
+    def _take(self, expected: str | None = None) -> str:
+        tok = self.tokens[self.pos]
+        if expected and tok.upper() != expected:
+            raise ValueError(f"Expected {expected}, got {tok!r} in CHECK")
+        self.pos += 1
+        return tok
+
+    # --- grammar ---
+    def _or(self):
+        parts = [self._and()]
+        while self._peek() == "OR":
+            self._take()
+            parts.append(self._and())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda df: _reduce(parts, df, "or")
+
+    def _and(self):
+        parts = [self._not()]
+        while self._peek() == "AND":
+            self._take()
+            parts.append(self._not())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda df: _reduce(parts, df, "and")
+
+    def _not(self):
+        if self._peek() == "NOT":
+            self._take()
+            inner = self._not()
+            return lambda df: ~inner(df)
+        return self._predicate()
+
+    def _predicate(self):
+        if self._peek() == "(":
+            self._take("(")
+            inner = self._or()
+            self._take(")")
+            return inner
+
+        left = self._operand()
+        op = self._peek()
+        if op == "IS":
+            self._take()
+            negate = self._peek() == "NOT"
+            if negate:
+                self._take()
+            self._take("NULL")
+            return lambda df: _as_bool(_value(left, df).isna() != negate, df)
+        if op == "NOT" and self._peek(1) in ("IN", "BETWEEN"):
+            self._take()
+            inner = self._predicate_tail(left)
+            return lambda df: ~inner(df)
+        return self._predicate_tail(left)
+
+    def _predicate_tail(self, left):
+        op = self._peek()
+        if op == "IN":
+            self._take()
+            self._take("(")
+            options = [self._operand()]
+            while self._peek() == ",":
+                self._take()
+                options.append(self._operand())
+            self._take(")")
+            # x IN (a, b) == x = a OR x = b, which carries NULL the SQL way
+            return lambda df: _reduce([_comparison(left, "=", o) for o in options], df, "or")
+        if op == "BETWEEN":
+            self._take()
+            low = self._operand()
+            self._take("AND")
+            high = self._operand()
+            return lambda df: _reduce([_comparison(left, ">=", low), _comparison(left, "<=", high)], df, "and")
+        if op in ("=", "<>", "!=", "<", "<=", ">", ">="):
+            self._take()
+            return _comparison(left, op, self._operand())
+        raise ValueError(f"Unsupported CHECK predicate at {op!r}")
+
+    def _operand(self):
+        tok = self._take()
+        upper = tok.upper()
+        if upper in ("TRUE", "FALSE"):
+            return ("literal", upper == "TRUE")
+        if upper == "NULL":
+            return ("literal", None)
+        if tok.startswith("'"):
+            return ("literal", tok[1:-1].replace("''", "'"))
+        if re.fullmatch(r"-?\d+(?:\.\d+)?", tok):
+            return ("literal", float(tok))
+        return ("column", tok.lower())
+
+
+def _value(operand, df: pd.DataFrame):
+    kind, value = operand
+    if kind == "column":
+        return df[value] if value in df.columns else pd.Series(pd.NA, index=df.index, dtype="Float64")
+    return value
+
+
+def _as_bool(values, df: pd.DataFrame) -> pd.Series:
+    if isinstance(values, pd.Series):
+        return values.astype("boolean")
+    return pd.Series(values, index=df.index, dtype="boolean")
+
+
+def _comparison(left, op: str, right):
+    def evaluate(df: pd.DataFrame) -> pd.Series:
+        a, b = _value(left, df), _value(right, df)
+        if a is None or b is None:  # comparing with NULL is NULL
+            return pd.Series(pd.NA, index=df.index, dtype="boolean")
+        if op == "=":
+            out = a == b
+        elif op in ("<>", "!="):
+            out = a != b
+        elif op == "<":
+            out = a < b
+        elif op == "<=":
+            out = a <= b
+        elif op == ">":
+            out = a > b
+        else:
+            out = a >= b
+        return _as_bool(out, df)
+    return evaluate
+
+
+def _reduce(parts, df: pd.DataFrame, how: str) -> pd.Series:
+    out = parts[0](df)
+    for part in parts[1:]:
+        out = (out | part(df)) if how == "or" else (out & part(df))
+    return out
+
+
+def compile_check(expression: str) -> Callable[[pd.DataFrame], pd.Series]:
+    """Vectorised evaluator of a CHECK expression (NULL where SQL yields NULL)."""
+    return _CheckParser(expression).parse()
+
+
+# -------------------------
+# Schema parsing
+# -------------------------
+def _strip_comments(sql: str) -> str:
+    return "\n".join(line.split("--", 1)[0] for line in sql.splitlines())
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _balanced(text: str, open_at: int) -> Tuple[str, int]:
+    """Contents of the parenthesis opening at open_at, and the index after its close."""
+    depth = 0
+    for i in range(open_at, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_at + 1:i], i + 1
+    raise ValueError("Unbalanced parentheses in schema")
+
+
+def _column_list(text: str) -> List[str]:
+    return [c.strip().lower() for c in text.split(",")]
+
+
+def _parse_column(item: str, table: TableRules) -> None:
+    m = re.match(r"(\w+)\s+(DOUBLE\s+PRECISION|\w+)\s*(?:\((\d+)(?:\s*,\s*(\d+))?\))?(.*)$", item, re.S | re.I)
+    if not m:
+        raise ValueError(f"Cannot parse column definition: {item!r}")
+    name = m.group(1).lower()
+    sql_type = re.sub(r"\s+", " ", m.group(2).upper())
+    rest = m.group(5)
+    col = ColumnRule(
+        name=name,
+        sql_type="DECIMAL" if sql_type == "NUMERIC" else sql_type,
+        length=int(m.group(3)) if m.group(3) else None,
+        scale=int(m.group(4)) if m.group(4) else (0 if m.group(3) and sql_type in ("DECIMAL", "NUMERIC") else None),
+    )
+    upper = rest.upper()
+    if "PRIMARY KEY" in upper:
+        col.not_null = True
+        table.keys[f"{table.name.split('.')[-1]}_pkey"] = [name]
+    elif re.search(r"\bUNIQUE\b", upper):
+        table.keys[f"{table.name.split('.')[-1]}_{name}_key"] = [name]
+    if "NOT NULL" in upper:
+        col.not_null = True
+    check = re.search(r"\bCHECK\s*\(", rest, re.I)
+    if check:
+        expression, _ = _balanced(rest, check.end() - 1)
+        rule_name = f"{table.name.split('.')[-1]}_{name}_check"
+        table.checks.append(CheckRule(rule_name, expression.strip(), compile_check(expression)))
+    table.columns[name] = col
+
+
+def _parse_table_item(item: str, table: TableRules, index: int) -> None:
+    m = re.match(r"CONSTRAINT\s+(\w+)\s+(.*)$", item, re.S | re.I)
+    name, body = (m.group(1).lower(), m.group(2)) if m else (None, item)
+    upper = body.upper()
+    short = table.name.split(".")[-1]
+
+    if upper.startswith("CHECK"):
+        expression, _ = _balanced(body, body.index("("))
+        table.checks.append(CheckRule(name or f"{short}_check{index}", expression.strip(), compile_check(expression)))
+    elif upper.startswith("PRIMARY KEY"):
+        cols = _column_list(_balanced(body, body.index("("))[0])
+        table.keys[name or f"{short}_pkey"] = cols
+        for c in cols:
+            if c in table.columns:
+                table.columns[c].not_null = True
+    elif upper.startswith("UNIQUE"):
+        cols = _column_list(_balanced(body, body.index("("))[0])
+        table.keys[name or f"{short}_{'_'.join(cols)}_key"] = cols
+    elif upper.startswith("FOREIGN KEY") or name:
+        pass  # foreign keys need the other table; not checked here
+    else:
+        _parse_column(item, table)
+
+
+def parse_schema(sql: str) -> Dict[str, TableRules]:
+    """
+    Rules of every CREATE TABLE in a SQL script.
+
+    Parameters
+    ----------
+    sql : str
+        DDL such as sql/01_schema.sql.
+
+    Returns
+    -------
+    dict
+        Schema-qualified table name -> TableRules.
+    """
+    sql = _strip_comments(sql)
+    tables = {}
+    for m in re.finditer(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)\s*\(", sql, re.I):
+        table = TableRules(name=m.group(1).lower())
+        body, _ = _balanced(sql, m.end() - 1)
+        for i, item in enumerate(_split_top_level(body), start=1):
+            _parse_table_item(item, table, i)
+        tables[table.name] = table
+    return tables
+
+
+def load_schema_rules(path: Path = SCHEMA_PATH) -> Dict[str, TableRules]:
+    return parse_schema(Path(path).read_text())
+
+
+# -------------------------
+# Validation
+# -------------------------
+def _coerce_column(values: pd.Series, rule: ColumnRule) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Column as Postgres would store it, plus a mask of values it would reject
+    (unparseable, out of range, too long).
+    """
+    present = values.notna().to_numpy()
+    t = rule.sql_type
+
+    if t in INTEGER_RANGES or t == "DECIMAL" or t in FLOAT_TYPES:
+        if pd.api.types.is_bool_dtype(values):
+            values = values.astype("Int64")
+        x = pd.to_numeric(values, errors="coerce")
+        x = x.to_numpy(dtype=float, na_value=np.nan) if hasattr(x, "to_numpy") else np.asarray(x, dtype=float)
+        missing = np.isnan(x)
+        bad = present & missing
+        with np.errstate(invalid="ignore"):
+            if t in INTEGER_RANGES:
+                x = np.round(x)
+                low, high = INTEGER_RANGES[t]
+                bad |= (x < low) | (x > high)
+            elif t == "DECIMAL" and rule.length is not None:
+                x = np.round(x, rule.scale or 0)
+                bad |= np.abs(x) >= 10.0 ** (rule.length - (rule.scale or 0))
+        # masked Float64 so comparisons in CHECKs yield NULL for missing values
+        return pd.Series(pd.arrays.FloatingArray(x, missing), index=values.index), bad
+
+    if t in ("VARCHAR", "CHAR", "TEXT"):
+        if not present.any():
+            return pd.Series(pd.NA, index=values.index, dtype="string"), np.zeros(len(values), dtype=bool)
+        s = values.astype("string")
+        bad = np.zeros(len(values), dtype=bool)
+        if rule.length is not None:
+            # measure the distinct values only: these columns are low-cardinality labels
+            too_long = [u for u in s.dropna().unique() if len(u) > rule.length]
+            if too_long:
+                bad = s.isin(too_long).to_numpy(dtype=bool, na_value=False)
+        return s, bad
+
+    if t in ("BOOLEAN", "BOOL"):
+        if pd.api.types.is_bool_dtype(values):
+            return values.astype("boolean"), np.zeros(len(values), dtype=bool)
+        s = values.astype("string").str.strip().str.lower()
+        b = pd.Series(pd.NA, index=values.index, dtype="boolean")
+        b[s.isin(TRUE_STRINGS).fillna(False)] = True
+        b[s.isin(FALSE_STRINGS).fillna(False)] = False
+        return b, present & b.isna().to_numpy()
+
+    return values, np.zeros(len(values), dtype=bool)
+
+
+def find_violations(df: pd.DataFrame, rules: TableRules) -> pd.DataFrame:
+    """
+    One boolean column per rule, True where the row breaks it.
+
+    Rule names: the constraint name for CHECK / PRIMARY KEY / UNIQUE (for keys,
+    every repeat after the first occurrence, plus NULL keys), "type:<col>" for
+    values the column type rejects and "not_null:<col>".
+    """
+    n = len(df)
+    masks: Dict[str, np.ndarray] = {}
+    stored = {}
+    for name, col in rules.columns.items():
+        values = df[name] if name in df.columns else pd.Series(pd.NA, index=df.index, dtype="object")
+        stored[name], bad = _coerce_column(values, col)
+        if bad.any():
+            masks[f"type:{name}"] = bad
+        if col.not_null:
+            masks[f"not_null:{name}"] = stored[name].isna().to_numpy()
+    coerced = pd.DataFrame(stored, index=df.index)
+
+    for check in rules.checks:
+        result = check.evaluate(coerced)
+        masks[check.name] = (result == False).fillna(False).to_numpy(dtype=bool)  # noqa: E712  (NULL passes)
+
+    for key_name, cols in rules.keys.items():
+        masks[key_name] = coerced.duplicated(subset=cols, keep="first").to_numpy()
+
+    return pd.DataFrame({k: v for k, v in masks.items()}, index=df.index) if masks else pd.DataFrame(index=range(n))
+
+
+def split_valid(df: pd.DataFrame, rules: TableRules) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    """
+    Split df into loadable rows and violating rows.
+
+    Returns
+    -------
+    (pd.DataFrame, pd.DataFrame, dict)
+        The valid rows (original values), the violating rows with a
+        VIOLATIONS_COL listing the broken rules, and the count per rule.
+    """
+    violations = find_violations(df, rules)
+    if violations.shape[1] == 0:
+        return df, df.iloc[0:0].assign(**{VIOLATIONS_COL: pd.Series(dtype="string")}), {}
+
+    matrix = violations.to_numpy(dtype=bool)
+    bad = matrix.any(axis=1)
+    counts = {name: int(c) for name, c in zip(violations.columns, matrix.sum(axis=0)) if c}
+
+    names = np.asarray(violations.columns)
+    labels = [";".join(names[row]) for row in matrix[bad]]
+    quarantined = df[bad].assign(**{VIOLATIONS_COL: pd.array(labels, dtype="string")})
+    return df[~bad], quarantined, counts
+
+
+def quarantine_invalid(
+    df: pd.DataFrame,
+    table: str,
+    rules: Dict[str, TableRules] | None = None,
+    out_dir: Path = QUARANTINE_DIR,
+) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """
+    Validate df against the schema rules of table (e.g. "mart.dim_customer")
+    and write violating rows to out_dir/<table>/<table>_<timestamp>.parquet.
+
+    Tables without rules (e.g. staging tables created from a parquet) pass
+    through unchanged.
+
+    Returns
+    -------
+    (pd.DataFrame, dict)
+        The rows safe to load, and a summary (rows, quarantined, by_rule, path).
+    """
+    rules = load_schema_rules() if rules is None else rules
+    summary: Dict[str, object] = {"table": table, "rows": len(df), "quarantined": 0, "by_rule": {}, "path": None}
+    if table not in rules:
+        return df, summary
+
+    valid, bad, counts = split_valid(df, rules[table])
+    summary.update(quarantined=len(bad), by_rule=counts)
+    if len(bad):
+        short = table.split(".")[-1]
+        path = Path(out_dir) / short / f"{short}_{datetime.now():%Y%m%d_%H%M%S_%f}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        bad.to_parquet(path, index=False)
+        summary["path"] = str(path)
+    return valid, summary
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from sklearn.metrics import precision_recall_curve
 
 def make_score_band_table(
     y_true,
@@ -130,3 +131,19 @@ def policy_summary(y_true, y_score, threshold: float) -> dict:
     }
 
 
+def select_threshold(y_true, y_score, target_recall: float = 0.70) -> dict:
+    """
+    Highest-precision threshold that still catches at least target_recall of
+    the defaults (the rule used in notebook 05).
+    """
+    precisions, recalls, thresholds = precision_recall_curve(y_true, y_score)
+    thresholds_full = np.append(thresholds, 1.0)
+
+    mask = recalls >= target_recall
+    best_idx = np.argmax(precisions[mask])
+
+    return {
+        "threshold": float(thresholds_full[mask][best_idx]),
+        "recall": float(recalls[mask][best_idx]),
+        "precision": float(precisions[mask][best_idx]),
+    }
@@ -0,0 +1,107 @@
+"""
+Model pipeline of notebook 05 and the pieces of cross-validation that run in
+worker processes.
+
+Each worker opens the cached feature matrix (src/data/features.py) memory-
+mapped once, in the pool initializer, and then fits one (candidate, fold)
+pair per task; a task is only a few numbers, the matrix itself is shared
+through the page cache. Splits are recomputed from y in every worker with
+fixed seeds, so all workers (and the parent) agree on them.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import average_precision_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from src.data.features import CATEGORICAL_FEATURES, NUMERIC_FEATURES, load_matrix, matrix_frame
+
+RANDOM_STATE = 42
+VALIDATION_SIZE = 0.2
+
+# notebook 05 configuration
+BASE_PARAMS = {"max_depth": 6, "learning_rate": 0.05, "max_iter": 400}
+
+
+def build_pipeline(params: Dict | None = None) -> Pipeline:
+    """Preprocessing + HistGradientBoostingClassifier, as saved to models/model.joblib."""
+    numeric_transformer = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="median")),
+    ])
+    categorical_transformer = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("onehot", OneHotEncoder(handle_unknown="ignore")),
+    ])
+    preprocess = ColumnTransformer(
+        transformers=[
+            ("num", numeric_transformer, NUMERIC_FEATURES),
+            ("cat", categorical_transformer, CATEGORICAL_FEATURES),
+        ],
+        remainder="drop",
+    )
+    return Pipeline(steps=[
+        ("preprocess", preprocess),
+        ("model", HistGradientBoostingClassifier(**{**BASE_PARAMS, **(params or {})}, random_state=RANDOM_STATE)),
+    ])
+
+
+def holdout_split(y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row indices of the stratified 80/20 train / validation split of notebook 05."""
+    return train_test_split(
+        np.arange(len(y)), test_size=VALIDATION_SIZE, stratify=y, random_state=RANDOM_STATE
+    )
+
+
+def cv_folds(y: np.ndarray, train_idx: np.ndarray, n_splits: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Stratified folds over the training rows, as row indices into the full matrix."""
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    return [(train_idx[fit], train_idx[score]) for fit, score in skf.split(train_idx, y[train_idx])]
+
+
+# -------------------------
+# Worker side
+# -------------------------
+_worker: Dict = {}
+
+
+def init_worker(cache_dir: Path, n_splits: int, threads: int) -> None:
+    """ProcessPoolExecutor initializer: map the matrix and compute the folds once per process."""
+    from threadpoolctl import threadpool_limits
+
+    # HGB is OpenMP-parallel; cap it so workers x threads stays within the cores
+    threadpool_limits(limits=threads)
+    X, y, meta = load_matrix(Path(cache_dir))
+    train_idx, _ = holdout_split(y)
+    _worker.update(X=X, y=y, meta=meta, folds=cv_folds(y, train_idx, n_splits))
+
+
+def fit_fold(candidate: int, params: Dict, fold: int) -> Dict:
+    """Fit one candidate on one fold in a worker; returns its scores and timing."""
+    X, y, meta = _worker["X"], _worker["y"], _worker["meta"]
+    fit_rows, score_rows = _worker["folds"][fold]
+
+    t0 = time.perf_counter()
+    model = build_pipeline(params)
+    model.fit(matrix_frame(X, meta, fit_rows), y[fit_rows])
+    t1 = time.perf_counter()
+    score = model.predict_proba(matrix_frame(X, meta, score_rows))[:, 1]
+    t2 = time.perf_counter()
+
+    return {
+        "candidate": candidate,
+        "fold": fold,
+        "roc_auc": float(roc_auc_score(y[score_rows], score)),
+        "pr_auc": float(average_precision_score(y[score_rows], score)),
+        "n_iter": int(model.named_steps["model"].n_iter_),
+        "fit_s": round(t1 - t0, 3),
+        "score_s": round(t2 - t1, 3),
+    }
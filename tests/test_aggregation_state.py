@@ -0,0 +1,55 @@
+"""
+The aggregation state and its manifest of applied deltas are written as one
+file with one rename, so they can never disagree after a crash.
+"""
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import src.data.aggregation as aggregation  # noqa: E402
+from src.data.aggregation import read_state, write_parquet_atomic, write_state  # noqa: E402
+
+STATE = pd.DataFrame({"sk_id_curr": [1, 2], "rows": [3, 4]})
+MANIFEST = {"base": "raw.csv", "rows": 7, "deltas": [{"file": "d.csv", "sha256": "ab"}]}
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / "state.parquet"
+    write_state(STATE, MANIFEST, path)
+    state, manifest = read_state(path)
+    pd.testing.assert_frame_equal(state, STATE)
+    assert manifest == MANIFEST
+    assert [p.name for p in tmp_path.iterdir()] == ["state.parquet"]
+
+
+def test_reads_and_retires_separate_manifest(tmp_path):
+    path = tmp_path / "state.parquet"
+    STATE.to_parquet(path, index=False)
+    path.with_suffix(".json").write_text(json.dumps(MANIFEST))
+    assert read_state(path)[1] == MANIFEST
+
+    write_state(STATE, {**MANIFEST, "deltas": []}, path)
+    assert not path.with_suffix(".json").exists()
+    assert read_state(path)[1]["deltas"] == []
+
+
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "state.parquet"
+    write_state(STATE, MANIFEST, path)
+
+    def crash(table, where):
+        Path(where).write_bytes(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(aggregation.pq, "write_table", crash)
+    with pytest.raises(OSError):
+        write_parquet_atomic(STATE.head(1), path)
+    monkeypatch.undo()
+
+    assert read_state(path)[1] == MANIFEST
+    assert [p.name for p in tmp_path.iterdir()] == ["state.parquet"]
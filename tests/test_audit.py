@@ -0,0 +1,49 @@
+"""
+AuditSink bookkeeping: every submitted row ends up either written or
+dropped, and restarting the writer does not stack atexit handlers.
+"""
+import atexit
+import sys
+import threading
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from api.audit import AuditSink  # noqa: E402
+
+ROWS = 10
+
+
+def submit_many(sink, batches):
+    for _ in range(batches):
+        sink.submit("/predict/batch", [{"x": 1}] * ROWS, [0.1] * ROWS,
+                    ["LOW"] * ROWS, ["APPROVE"] * ROWS, [[]] * ROWS)
+
+
+def test_stats_account_for_every_row(tmp_path):
+    sink = AuditSink(out_dir=tmp_path, batch_rows=50, flush_interval_s=0.01, max_buffer_rows=200)
+    threads = [threading.Thread(target=submit_many, args=(sink, 200)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sink.close()
+
+    stats = sink.snapshot()
+    written = sum(pq.read_metadata(f).num_rows for f in tmp_path.rglob("*.parquet"))
+    assert stats["submitted_rows"] == 8 * 200 * ROWS
+    assert stats["written_rows"] == written
+    assert stats["written_rows"] + stats["dropped_rows"] == stats["submitted_rows"]
+    assert stats["flush_errors"] == 0
+
+
+def test_restart_registers_close_once(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    sink = AuditSink(out_dir=tmp_path)
+    for _ in range(3):
+        submit_many(sink, 1)
+        sink.close()
+    assert registered == [sink.close]
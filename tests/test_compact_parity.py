@@ -0,0 +1,49 @@
+"""
+The compact artifact (api/compact.py) must score like the pipeline it was
+exported from. The export reads private HistGradientBoosting attributes, so
+this also catches a scikit-learn upgrade that changes them.
+"""
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from api.compact import export_compact, load_compact  # noqa: E402
+from api.model import MODEL_PATH  # noqa: E402
+from scripts.export_compact_model import TOLERANCE, parity_frame  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    if not MODEL_PATH.exists():
+        pytest.skip(f"{MODEL_PATH} not found")
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def compact(pipeline, tmp_path_factory):
+    out = tmp_path_factory.mktemp("compact")
+    export_compact(pipeline, out, source=MODEL_PATH)
+    return load_compact(out)
+
+
+def test_probabilities_match_pipeline(pipeline, compact):
+    frame = parity_frame(compact, 20_000)
+    expected = pipeline.predict_proba(frame)[:, 1]
+    actual = compact.predict_proba(frame)[:, 1]
+    assert np.abs(expected - actual).max() <= TOLERANCE
+
+
+def test_schema_matches_pipeline(pipeline, compact):
+    from api.model import _expected_raw_features
+
+    assert compact.features == _expected_raw_features(pipeline)
+    assert compact.schema["n_trees"] == len(pipeline.named_steps["model"]._predictors)
+
+
+def test_empty_frame(compact):
+    assert compact.predict_proba(parity_frame(compact, 0)).shape == (0, 2)
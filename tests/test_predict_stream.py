@@ -0,0 +1,53 @@
+"""
+/predict/stream answers every input record: a record that cannot be scored
+gets its own error line, tagged with the physical line it came from, and
+does not take the rest of its batch down with it.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ["AUDIT_ENABLED"] = "0"
+
+from api.model import MODEL_PATH  # noqa: E402
+
+if not MODEL_PATH.exists():
+    pytest.skip(f"{MODEL_PATH} not found", allow_module_level=True)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.main import app  # noqa: E402
+
+VALID = {"ext_source_1": 0.5, "ext_source_2": 0.6, "amt_income_total_log": 12.0, "name_contract_type": "Cash loans"}
+
+
+def stream(lines, **params):
+    body = ("\n".join(lines) + "\n").encode()
+    with TestClient(app) as client:
+        resp = client.post("/predict/stream", content=body, params=params,
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 2000])
+def test_bad_value_only_fails_its_record(batch_size):
+    bad = {**VALID, "ext_source_1": "abc"}
+    lines = [json.dumps({"features": f}) for f in (VALID, VALID, bad, VALID, VALID)]
+    results = stream(lines, batch_size=batch_size)
+
+    assert [r["line"] for r in results] == [1, 2, 3, 4, 5]
+    assert [("error" in r) for r in results] == [False, False, True, False, False]
+    assert all("default_probability" in r for i, r in enumerate(results) if i != 2)
+
+
+def test_line_numbers_count_blank_lines():
+    record = json.dumps({"features": VALID})
+    results = stream(["", record, "   ", "not json", "", record], batch_size=2)
+
+    assert [r["line"] for r in results] == [2, 4, 6]
+    assert "error" in results[1] and "error" not in results[0] and "error" not in results[2]
@@ -0,0 +1,47 @@
+"""
+select_threshold (src/model_evaluation.py) replaces the threshold cell of
+notebook 05. The cell is read from the notebook and run as is, so the two
+must keep picking the same threshold.
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.metrics import precision_recall_curve
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.model_evaluation import select_threshold  # noqa: E402
+
+NOTEBOOK = Path(__file__).resolve().parents[1] / "notebooks" / "05_ml_models.ipynb"
+
+
+@pytest.fixture(scope="module")
+def notebook_cell():
+    cells = json.loads(NOTEBOOK.read_text())["cells"]
+    sources = ["".join(c["source"]) for c in cells if c["cell_type"] == "code"]
+    return next(s for s in sources if "thresholds_full" in s and "target_recall = " in s)
+
+
+def run_cell(cell, y_true, y_score, target_recall):
+    precisions, recalls, thresholds = precision_recall_curve(y_true, y_score)
+    ns = {"np": np, "precisions": precisions, "recalls": recalls, "thresholds": thresholds}
+    exec(cell.replace("target_recall = 0.70", f"target_recall = {target_recall!r}"), ns)
+    return ns["best_threshold"], ns["best_recall"], ns["best_precision"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("target_recall", [0.5, 0.70, 0.95, 1.0])
+@pytest.mark.parametrize("decimals", [None, 2])  # rounded scores produce tied thresholds
+def test_matches_notebook(notebook_cell, seed, target_recall, decimals):
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random(5_000) < 0.08).astype(int)
+    y_score = 1 / (1 + np.exp(-(rng.normal(-2.5, 1.0, len(y_true)) + 1.5 * y_true)))
+    if decimals is not None:
+        y_score = y_score.round(decimals)
+
+    expected = run_cell(notebook_cell, y_true, y_score, target_recall)
+    chosen = select_threshold(y_true, y_score, target_recall)
+    assert (chosen["threshold"], chosen["recall"], chosen["precision"]) == expected